@@ -29,14 +29,23 @@ CREATE TABLE IF NOT EXISTS processed_files (
     records_count INTEGER
 );
 
+-- Drop the earlier single-column indexes, covered by the composites below
+-- (same list as OBSOLETE_INDEXES in init_db.py)
+DROP INDEX IF EXISTS idx_rank, idx_quota, idx_category, idx_college_name, idx_course,
+    idx_year_round, idx_year_round_rank, idx_college, idx_state;
+
 -- Create indexes for faster queries
-CREATE INDEX IF NOT EXISTS idx_rank ON counselling_data(rank);
-CREATE INDEX IF NOT EXISTS idx_quota ON counselling_data(quota);
-CREATE INDEX IF NOT EXISTS idx_category ON counselling_data(category);
-CREATE INDEX IF NOT EXISTS idx_college ON counselling_data USING HASH(college_name);
-CREATE INDEX IF NOT EXISTS idx_course ON counselling_data USING HASH(course);
-CREATE INDEX IF NOT EXISTS idx_year_round ON counselling_data(year, round);
-CREATE INDEX IF NOT EXISTS idx_state ON counselling_data(state);
+CREATE INDEX IF NOT EXISTS idx_elig_cover ON counselling_data(rank, quota, category, college_name, course, round, year, state);
+CREATE INDEX IF NOT EXISTS idx_college_course ON counselling_data(college_name, course, quota, category, round, year, rank);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_counselling_identity ON counselling_data(year, round, rank, quota, college_name, course, category);
+
+-- Trigram indexes for substring search (ILIKE '%term%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_college_name_trgm ON counselling_data USING GIN (college_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_course_trgm ON counselling_data USING GIN (course gin_trgm_ops);
+
+-- Per-seat cutoffs view from earlier versions; nothing reads it anymore
+DROP MATERIALIZED VIEW IF EXISTS cutoffs;
 
 -- Add comments for documentation
 COMMENT ON TABLE counselling_data IS 'NEET PG counselling allocation data from State and All India quota';
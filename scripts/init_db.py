@@ -2,138 +2,197 @@
 """Initialize database tables for NEET PG application on Render.com"""
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
 import os
 import sys
 
+# Main counselling data table
+COUNSELLING_DDL = '''
+CREATE TABLE IF NOT EXISTS counselling_data (
+    id SERIAL PRIMARY KEY,
+    year INTEGER,
+    round INTEGER,
+    rank INTEGER,
+    quota TEXT,
+    state TEXT,
+    college_name TEXT,
+    course TEXT,
+    category TEXT,
+    sub_category TEXT,
+    gender TEXT,
+    physically_handicapped TEXT,
+    marks_obtained INTEGER,
+    max_marks INTEGER,
+    status TEXT,
+    date_of_admission TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+'''
+
+# Processed files tracking table
+PROCESSED_FILES_DDL = '''
+CREATE TABLE IF NOT EXISTS processed_files (
+    id SERIAL PRIMARY KEY,
+    filename TEXT UNIQUE,
+    file_type TEXT,
+    processed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    records_count INTEGER
+)
+'''
+
+# Indexes for the app's query patterns
+INDEXES = (
+    ('idx_elig_cover', 'counselling_data(rank, quota, category, college_name, course, round, year, state)'),
+    ('idx_college_course', 'counselling_data(college_name, course, quota, category, round, year, rank)'),
+)
+
+# Natural key of an allotment (same as pdf_uploader.py), so inserts can
+# skip existing rows with ON CONFLICT DO NOTHING
+IDENTITY_INDEX_DDL = '''
+CREATE UNIQUE INDEX IF NOT EXISTS ux_counselling_identity
+ON counselling_data(year, round, rank, quota, college_name, course, category)
+'''
+
+# Earlier single-column indexes: rank and college_name lead the composites
+# above, (year, round, rank) is a prefix of ux_counselling_identity, and
+# nothing filters on quota, category or course alone (course search uses the
+# trigram index). pdf_uploader.py imports this list and OBSOLETE_VIEWS;
+# create_tables.sql repeats them.
+OBSOLETE_INDEXES = ('idx_rank', 'idx_quota', 'idx_category', 'idx_college_name', 'idx_course',
+                    'idx_year_round', 'idx_year_round_rank', 'idx_college', 'idx_state')
+
+# Trigram indexes let the search endpoint's ILIKE '%q%' use an index
+TRIGRAM_INDEXES = (
+    ('idx_college_name_trgm', 'counselling_data USING GIN (college_name gin_trgm_ops)'),
+    ('idx_course_trgm', 'counselling_data USING GIN (course gin_trgm_ops)'),
+)
+
+# Per-seat cutoffs view from earlier versions; nothing reads it anymore
+OBSOLETE_VIEWS = ('cutoffs',)
+
+SAMPLE_DATA = (
+    (2024, 3, 52, 'AI', 'Delhi', 'Vardhman Mahavir Medical College, New Delhi', 'MD - General Medicine', 'GENERAL'),
+    (2024, 3, 73, 'AI', 'Tamil Nadu', 'Madras Medical College, Chennai', 'MD - General Medicine', 'OBC'),
+    (2024, 3, 82, 'AI', 'Delhi', 'University College of Medical Sciences, Delhi', 'MD - General Medicine', 'GENERAL'),
+    (2024, 3, 87, 'DU', 'Delhi', 'Maulana Azad Medical College, Delhi', 'MD - General Medicine', 'GENERAL'),
+    (2024, 1, 3886, 'State Quota', 'Andhra Pradesh', 'Alluri Sitaram Raju Academy of Medical Sciences, Eluru', 'MD - Radio Diagnosis/Radiology', 'OBC'),
+)
+
+# Connection settings are resolved once at import
+DATABASE_URL = os.getenv('DATABASE_URL')
+if DATABASE_URL:
+    # Production: Use DATABASE_URL from environment (Render.com provides this)
+    CONNECTION_KWARGS = {'dsn': DATABASE_URL}
+    CONNECTION_LABEL = "production database (DATABASE_URL)"
+else:
+    # Local development: Use local PostgreSQL
+    CONNECTION_KWARGS = {'host': 'localhost', 'database': 'neetpg', 'user': 'avesh'}
+    CONNECTION_LABEL = "local PostgreSQL database"
+
+# Detect a dropped connection within about a minute instead of waiting on the
+# OS TCP timeout, and cap any single statement so a stuck deploy hook fails fast
+CONNECTION_KWARGS.update(
+    keepalives=1,
+    keepalives_idle=30,
+    keepalives_interval=10,
+    keepalives_count=3,
+    options='-c statement_timeout=60000'
+)
+
 def get_db_connection():
     """Create PostgreSQL database connection"""
-    DATABASE_URL = os.getenv('DATABASE_URL')
-    
     try:
-        if DATABASE_URL:
-            # Production: Use DATABASE_URL from environment (Render.com provides this)
-            conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-            print("Using production database (DATABASE_URL)")
-        else:
-            # Local development: Use local PostgreSQL
-            conn = psycopg2.connect(
-                host='localhost',
-                database='neetpg',
-                user='avesh',
-                cursor_factory=RealDictCursor
-            )
-            print("Using local PostgreSQL database")
-        
+        conn = psycopg2.connect(**CONNECTION_KWARGS)
+        print(f"Using {CONNECTION_LABEL}")
         return conn
     except Exception as e:
         print(f"Error connecting to database: {e}")
         print("Make sure PostgreSQL is running and the database exists")
         sys.exit(1)
 
-def create_tables():
+def create_tables(conn):
     """Create necessary database tables in PostgreSQL"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     
     print("Creating database tables...")
     
     try:
-        # Main counselling data table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS counselling_data (
-            id SERIAL PRIMARY KEY,
-            year INTEGER,
-            round INTEGER,
-            rank INTEGER,
-            quota TEXT,
-            state TEXT,
-            college_name TEXT,
-            course TEXT,
-            category TEXT,
-            sub_category TEXT,
-            gender TEXT,
-            physically_handicapped TEXT,
-            marks_obtained INTEGER,
-            max_marks INTEGER,
-            status TEXT,
-            date_of_admission TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        print("✅ Created counselling_data table")
+        # Everything below runs in one transaction; an interrupted init is
+        # simply re-run, so skip waiting for the WAL flush on commit
+        cursor.execute("SET LOCAL synchronous_commit = off")
         
-        # Processed files tracking table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS processed_files (
-            id SERIAL PRIMARY KEY,
-            filename TEXT UNIQUE,
-            file_type TEXT,
-            processed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            records_count INTEGER
-        )
-        ''')
+        # Tables first, as one multi-statement execute
+        cursor.execute(';\n'.join([COUNSELLING_DDL, PROCESSED_FILES_DDL]))
+        print("✅ Created counselling_data table")
         print("✅ Created processed_files table")
         
-        # Create indexes for better query performance
-        indexes = [
-            ('idx_rank', 'counselling_data(rank)'),
-            ('idx_quota', 'counselling_data(quota)'),
-            ('idx_category', 'counselling_data(category)'),
-            ('idx_college_name', 'counselling_data(college_name)'),
-            ('idx_course', 'counselling_data(course)'),
-            ('idx_year_round', 'counselling_data(year, round)')
-        ]
+        # Seed sample data into an empty table before any index exists, so the
+        # indexes below are built in bulk rather than maintained row by row.
+        # The emptiness check runs in the same statement as the insert, and
+        # ON CONFLICT makes re-runs a no-op once the unique index exists.
+        execute_values(cursor, '''
+        INSERT INTO counselling_data 
+        (year, round, rank, quota, state, college_name, course, category)
+        SELECT * FROM (VALUES %s) AS sample
+        WHERE NOT EXISTS (SELECT 1 FROM counselling_data)
+        ON CONFLICT DO NOTHING
+        ''', SAMPLE_DATA, page_size=len(SAMPLE_DATA))
+        sample_inserted = cursor.rowcount
+        if sample_inserted > 0:
+            print(f"✅ Inserted {sample_inserted} sample records")
         
-        for index_name, index_def in indexes:
-            cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {index_def}')
+        # Then every index in a second execute. Index builds sort in
+        # maintenance_work_mem, so give them room, and on a populated table
+        # they can outlast the connection's statement_timeout, so lift it
+        ddl = ["SET LOCAL maintenance_work_mem = '256MB'", 'SET LOCAL statement_timeout = 0']
+        ddl.append(f"DROP INDEX IF EXISTS {', '.join(OBSOLETE_INDEXES)}")
+        ddl.append(f"DROP MATERIALIZED VIEW IF EXISTS {', '.join(OBSOLETE_VIEWS)}")
+        ddl += [f'CREATE INDEX IF NOT EXISTS {name} ON {definition}' for name, definition in INDEXES]
+        ddl.append('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        ddl += [f'CREATE INDEX IF NOT EXISTS {name} ON {definition}' for name, definition in TRIGRAM_INDEXES]
+        cursor.execute(';\n'.join(ddl))
+        
+        for index_name, _ in INDEXES + TRIGRAM_INDEXES:
             print(f"✅ Created index {index_name}")
         
-        # Insert some sample data if table is empty
-        cursor.execute('SELECT COUNT(*) as count FROM counselling_data')
-        count = cursor.fetchone()['count']
+        conn.commit()
         
-        if count == 0:
-            print("Inserting sample data...")
-            sample_data = [
-                (2024, 3, 52, 'AI', 'Delhi', 'Vardhman Mahavir Medical College, New Delhi', 'MD - General Medicine', 'GENERAL'),
-                (2024, 3, 73, 'AI', 'Tamil Nadu', 'Madras Medical College, Chennai', 'MD - General Medicine', 'OBC'),
-                (2024, 3, 82, 'AI', 'Delhi', 'University College of Medical Sciences, Delhi', 'MD - General Medicine', 'GENERAL'),
-                (2024, 3, 87, 'DU', 'Delhi', 'Maulana Azad Medical College, Delhi', 'MD - General Medicine', 'GENERAL'),
-                (2024, 1, 3886, 'State Quota', 'Andhra Pradesh', 'Alluri Sitaram Raju Academy of Medical Sciences, Eluru', 'MD - Radio Diagnosis/Radiology', 'OBC'),
-            ]
-            
-            for data in sample_data:
-                cursor.execute('''
-                INSERT INTO counselling_data 
-                (year, round, rank, quota, state, college_name, course, category)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ''', data)
-            
-            print(f"✅ Inserted {len(sample_data)} sample records")
+        # The natural-key index gets its own transaction: rows loaded before it
+        # existed may contain duplicates, which shouldn't undo everything above
+        try:
+            cursor.execute('SET LOCAL statement_timeout = 0;\n' + IDENTITY_INDEX_DDL)
+            conn.commit()
+            print("✅ Created unique index ux_counselling_identity")
+        except psycopg2.IntegrityError as e:
+            conn.rollback()
+            print(f"⚠️ Could not create unique index ux_counselling_identity, existing rows contain duplicates: {e}")
         
-        conn.commit()
         print("✅ Database initialization completed successfully!")
         
     except Exception as e:
         print(f"❌ Error creating tables: {e}")
         conn.rollback()
         sys.exit(1)
-    finally:
-        conn.close()
 
-def verify_setup():
+def verify_setup(conn):
     """Verify database setup"""
-    conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Check tables exist
+        # Check tables and indexes exist in one catalog round-trip, reading
+        # pg_class/pg_index directly rather than through the catalog views
         cursor.execute("""
-        SELECT table_name FROM information_schema.tables 
-        WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
+        SELECT 'table', c.relname FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+        UNION ALL
+        SELECT 'index', i.relname FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass('public.counselling_data')
         """)
-        tables = [row['table_name'] for row in cursor.fetchall()]
+        catalog = cursor.fetchall()
+        tables = [name for kind, name in catalog if kind == 'table']
+        indexes = [name for kind, name in catalog if kind == 'index']
         
         required_tables = ['counselling_data', 'processed_files']
         for table in required_tables:
@@ -143,17 +202,11 @@ def verify_setup():
                 print(f"❌ Table {table} missing")
                 return False
         
-        # Check data
-        cursor.execute('SELECT COUNT(*) as count FROM counselling_data')
-        count = cursor.fetchone()['count']
+        # Check data (only once the table is known to exist)
+        cursor.execute('SELECT COUNT(*) FROM counselling_data')
+        count = cursor.fetchone()[0]
         print(f"✅ Total records in counselling_data: {count}")
         
-        # Check indexes
-        cursor.execute("""
-        SELECT indexname FROM pg_indexes 
-        WHERE tablename = 'counselling_data' AND schemaname = 'public'
-        """)
-        indexes = [row['indexname'] for row in cursor.fetchall()]
         print(f"✅ Indexes created: {len(indexes)}")
         
         return True
@@ -161,15 +214,20 @@ def verify_setup():
     except Exception as e:
         print(f"❌ Error verifying setup: {e}")
         return False
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     print("🚀 Initializing NEET PG database...")
-    create_tables()
+    # One connection for both steps, so the handshake is paid once
+    conn = get_db_connection()
+    try:
+        create_tables(conn)
+        
+        print("\n🔍 Verifying setup...")
+        setup_ok = verify_setup(conn)
+    finally:
+        conn.close()
     
-    print("\n🔍 Verifying setup...")
-    if verify_setup():
+    if setup_ok:
         print("\n🎉 Database setup completed successfully!")
         print("\n📋 Next steps:")
         print("1. Deploy your application to Render.com")
@@ -1,23 +1,223 @@
-import pandas as pd
 import psycopg2
-from psycopg2.extras import RealDictCursor
-import PyPDF2
-import pdfplumber
+from psycopg2.extras import RealDictCursor, execute_values
 import re
 from datetime import datetime
 import json
+import math
 import os
-import glob
+import random
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+
+# Retired indexes and views are listed once, in init_db.py
+from init_db import OBSOLETE_INDEXES, OBSOLETE_VIEWS
+
+# Patterns used on every parsed row, compiled once at import
+RANK_RE = re.compile(r'(\d{4,6})')
+MARKS_RE = re.compile(r'(\d+)\s*/\s*(\d+)')
+STIPEND_RE = re.compile(r'(\d+)')
+ALL_INDIA_TEXT_PATTERNS = (
+    # Pattern for simple format: rank quota college course status
+    re.compile(r'(\d+)\s+(AI|IP|DU|All India)\s+([^M]+?)(M\.[DS]\..+?)(?:Reported|Not\s+Reported|Seat\s+Surrendered|Allotted)'),
+    # Pattern for more complex format
+    re.compile(r'(\d+)\s+(\w+)\s+(.+?)\s+(M\.[DS]\.\s*.+?)(?:Open|General|OBC|SC|ST|EWS|Allotted)'),
+)
+
+# Pages handed to a worker per task. Small blocks keep the workers evenly
+# loaded when some pages are much denser than others, while each task still
+# amortises reopening the PDF over several pages.
+PAGES_PER_TASK = 10
+# Below this many pages, starting worker processes (each importing pdfplumber
+# and reopening the file) costs more than it saves; parse in-process instead
+MIN_PAGES_FOR_POOL = 8
+
+# Text backends for pages without a ruled table. pdfplumber runs pdfminer's
+# layout analysis; pypdfium reads PDFium's text layer, which is much faster
+# but orders wrapped cells differently, so the regex fallback may match less.
+TEXT_BACKENDS = ('plumber', 'pypdfium')
+
+# PDF layouts process_pdf_file understands: State Quota allotment lists and
+# All India round results
+FILE_TYPES = ('state', 'all_india')
+# Filename words that mark an All India result in batch_import_pdfs
+ALL_INDIA_FILENAME_MARKERS = ('round', 'result')
+# Attempts per file when parallel imports deadlock on shared keys
+IMPORT_ATTEMPTS = 3
+
+# Select-list expression behind each get_statistics() entry
+STATISTICS_FIELDS = {
+    'total_records': 'COUNT(*)',
+    'by_quota': '''(SELECT json_agg(json_build_array(quota, n)) FROM (
+        SELECT quota, COUNT(*) AS n FROM counselling_data
+        GROUP BY quota
+    ) q)''',
+    'by_category': '''(SELECT json_agg(json_build_array(category, n)) FROM (
+        SELECT category, COUNT(*) AS n FROM counselling_data
+        WHERE category IS NOT NULL
+        GROUP BY category
+    ) c)''',
+    'unique_colleges': 'COUNT(DISTINCT college_name)',
+    'unique_courses': 'COUNT(DISTINCT course)',
+}
+
+# Secondary indexes on counselling_data. Bulk folder imports drop these and
+# rebuild them once at the end; ux_counselling_identity always stays, since
+# ON CONFLICT needs it.
+SECONDARY_INDEXES = (
+    # Covering index for rank-range eligibility lookups
+    ('idx_elig_cover', 'counselling_data(rank, quota, category, college_name, course, round, year, state)'),
+    # Per-college cutoff lookups and JSON export grouping
+    ('idx_college_course', 'counselling_data(college_name, course, quota, category, round, year, rank)'),
+)
+# Trigram indexes serve the web app's substring search (ILIKE '%q%')
+TRIGRAM_INDEXES = (
+    ('idx_college_name_trgm', 'counselling_data USING GIN (college_name gin_trgm_ops)'),
+    ('idx_course_trgm', 'counselling_data USING GIN (course gin_trgm_ops)'),
+)
+
+# Everything create_tables() sets up, and the indexes and views it drops. When the
+# catalog already matches, one probe replaces the whole DDL sequence.
+SCHEMA_RELATIONS = (
+    'counselling_data', 'processed_files', 'verification_records',
+    'idx_verification_counselling_data', 'idx_verification_processed_file',
+    'idx_verification_status', 'ux_counselling_identity',
+    *(name for name, _ in SECONDARY_INDEXES + TRIGRAM_INDEXES),
+)
+SCHEMA_CURRENT_SQL = '''
+SELECT (SELECT bool_and(to_regclass(name) IS NOT NULL) FROM unnest(%s::text[]) AS name)
+   AND (SELECT bool_and(to_regclass(name) IS NULL) FROM unnest(%s::text[]) AS name)
+'''
+
+COUNSELLING_COLUMNS = (
+    'year', 'round', 'rank', 'quota', 'state', 'college_name', 'course',
+    'category', 'sub_category', 'gender', 'physically_handicapped',
+    'marks_obtained', 'max_marks', 'status', 'date_of_admission',
+    'student_name', 'date_of_birth', 'exam_name_roll', 'pg_teacher',
+    'stipend_amount', 'student_regn_no', 'registered_council'
+)
+
+# Session-local staging table for COPY. COPY has no ON CONFLICT, so rows are
+# streamed here first and moved into counselling_data with a single
+# INSERT ... SELECT that skips duplicates.
+CREATE_COUNSELLING_STAGE_SQL = f'''
+CREATE TEMP TABLE IF NOT EXISTS counselling_stage AS
+SELECT {', '.join(COUNSELLING_COLUMNS)} FROM counselling_data WITH NO DATA
+'''
+COPY_COUNSELLING_STAGE_SQL = f'''
+COPY counselling_stage ({', '.join(COUNSELLING_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')
+'''
+MERGE_COUNSELLING_STAGE_SQL = f'''
+INSERT INTO counselling_data ({', '.join(COUNSELLING_COLUMNS)})
+SELECT {', '.join(COUNSELLING_COLUMNS)} FROM counselling_stage
+ON CONFLICT DO NOTHING
+'''
+
+# Natural key of an allotment (ux_counselling_identity). The RETURNING form
+# of the merge reports it with each new id, so callers can match ids back to
+# the rows they staged.
+IDENTITY_COLUMNS = ('year', 'round', 'rank', 'quota', 'college_name', 'course', 'category')
+row_identity = itemgetter(*(COUNSELLING_COLUMNS.index(column) for column in IDENTITY_COLUMNS))
+MERGE_COUNSELLING_STAGE_RETURNING_SQL = MERGE_COUNSELLING_STAGE_SQL + f'''RETURNING id, {', '.join(IDENTITY_COLUMNS)}
+'''
+
+
+def counselling_row(record):
+    """Parsed record dict -> parameter tuple in COUNSELLING_COLUMNS order"""
+    get = record.get
+    return (
+        get('year', 2024), get('round', 1), get('rank'), get('quota'), get('state'),
+        get('college_name'), get('course'), get('category'), get('sub_category'),
+        get('gender'), get('physically_handicapped'), get('marks_obtained'),
+        get('max_marks'), get('status'), get('date_of_admission'), get('student_name'),
+        get('date_of_birth'), get('exam_name_roll'), get('pg_teacher'),
+        get('stipend_amount'), get('student_regn_no'), get('registered_council')
+    )
+
+
+def match_returned_ids(rows, returned):
+    """Map (id, *identity) rows from an INSERT ... RETURNING back onto the
+    inserted parameter rows: the new id for each row, None for duplicates
+    
+    RETURNING order isn't guaranteed, so ids are matched by natural key. A key
+    can come back more than once when it contains NULLs (those never
+    conflict); its ids are handed out in insertion order.
+    """
+    ids_by_identity = {}
+    for record_id, *identity in returned:
+        ids_by_identity.setdefault(tuple(identity), deque()).append(record_id)
+    
+    row_ids = []
+    for row in rows:
+        ids = ids_by_identity.get(row_identity(row))
+        row_ids.append(ids.popleft() if ids else None)
+    return row_ids
+
+
+class CSVRowStream:
+    """Read-only file object that CSV-encodes rows as COPY asks for them
+    
+    Rows are pulled from the iterable only when read() needs more data, so a
+    whole PDF can go through one COPY without the records being held in a
+    list. NULLs are written as \\N to match COPY_COUNSELLING_STAGE_SQL.
+    """
+    
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buf = io.StringIO()
+        self.writer = csv.writer(self.buf)
+        self.row_count = 0
+    
+    def read(self, size=-1):
+        buf = self.buf
+        while size < 0 or buf.tell() < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow(tuple('\\N' if value is None else value for value in row))
+            self.row_count += 1
+        
+        data = buf.getvalue()
+        if size < 0 or len(data) <= size:
+            chunk, rest = data, ''
+        else:
+            chunk, rest = data[:size], data[size:]
+        buf.seek(0)
+        buf.truncate()
+        buf.write(rest)
+        return chunk
+
 
 class NEETPGDataProcessor:
-    def __init__(self, db_name='neet_pg_counselling.db'):
-        """Initialize the processor with database connection"""
+    def __init__(self, connect=True, page_workers=None):
+        """Initialize the processor with database connection
+        
+        Args:
+            connect (bool): Open the database connection. PDF parsing workers
+                only need the parsers and pass False.
+            page_workers (int): Processes used to parse the pages of one PDF.
+                Defaults to the CPU count; 1 parses in this process.
+        """
         # Use PostgreSQL connection from environment or local config
         self.db_config = self.get_db_config()
+        self.conn = None
+        self.cursor = None
+        self.page_workers = page_workers or os.cpu_count() or 1
+        if connect:
+            self.connect()
+        self.setup_abbreviation_mappings()
+    
+    def connect(self, create_tables=True):
+        """Open the database connection and cursor, creating the schema unless told not to"""
         self.conn = self.get_db_connection()
         self.cursor = self.conn.cursor()
-        self.create_tables()
-        self.setup_abbreviation_mappings()
+        if create_tables:
+            self.create_tables()
     
     def get_db_config(self):
         """Get database configuration from environment or use defaults"""
@@ -37,7 +237,13 @@ class NEETPGDataProcessor:
                 database=self.db_config['database'],
                 user=self.db_config['user'],
                 password=self.db_config['password'],
-                port=self.db_config['port']
+                port=self.db_config['port'],
+                # Everything this script writes can be re-derived from the
+                # PDFs, so batch commits don't wait for the WAL flush.
+                # temp_buffers keeps the COPY staging table in memory (it
+                # only takes effect before the session's first temp table),
+                # and work_mem lets the export and status aggregates run in memory.
+                options='-c synchronous_commit=off -c temp_buffers=64MB -c work_mem=128MB'
             )
             return conn
         except Exception as e:
@@ -46,6 +252,9 @@ class NEETPGDataProcessor:
     
     def create_tables(self):
         """Create necessary database tables using PostgreSQL syntax"""
+        # After the first run the schema is normally complete already
+        if self.schema_is_current():
+            return
         
         # Main colleges data table
         self.cursor.execute('''
@@ -77,16 +286,9 @@ class NEETPGDataProcessor:
         )
         ''')
         
-        # Create indexes for faster queries
-        self.cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_rank ON counselling_data(rank)
-        ''')
-        self.cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_quota ON counselling_data(quota)
-        ''')
-        self.cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_category ON counselling_data(category)
-        ''')
+        # Single-column indexes superseded by the composites below (rank leads
+        # idx_elig_cover; no query filters on quota or category alone)
+        self.cursor.execute(f"DROP INDEX IF EXISTS {', '.join(OBSOLETE_INDEXES)}")
         
         # Table for storing processed files
         self.cursor.execute('''
@@ -130,6 +332,81 @@ class NEETPGDataProcessor:
         ''')
         
         self.conn.commit()
+        
+        # Natural key of an allotment, so duplicates are skipped by ON CONFLICT
+        try:
+            self.cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_counselling_identity
+            ON counselling_data(year, round, rank, quota, college_name, course, category)
+            ''')
+            self.conn.commit()
+        except psycopg2.IntegrityError as e:
+            self.conn.rollback()
+            print(f"Warning: could not create unique index on counselling_data, existing rows contain duplicates: {e}")
+        
+        self.create_secondary_indexes()
+        
+        self.cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {', '.join(OBSOLETE_VIEWS)}")
+        self.conn.commit()
+    
+    def schema_is_current(self):
+        """Check in one round-trip whether every table and index from
+        create_tables() exists and none of the obsolete indexes or views remain"""
+        self.cursor.execute(SCHEMA_CURRENT_SQL, (list(SCHEMA_RELATIONS), list(OBSOLETE_INDEXES + OBSOLETE_VIEWS)))
+        is_current = self.cursor.fetchone()[0]
+        self.conn.commit()
+        return is_current
+    
+    def create_secondary_indexes(self):
+        """Create the lookup and trigram search indexes on counselling_data if missing"""
+        # Index builds sort in maintenance_work_mem; give a rebuild after a
+        # bulk import room to do it in memory
+        self.cursor.execute("SET LOCAL maintenance_work_mem = '256MB'")
+        for name, definition in SECONDARY_INDEXES:
+            self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+        self.conn.commit()
+        
+        try:
+            self.cursor.execute("SET LOCAL maintenance_work_mem = '256MB'")
+            self.cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for name, definition in TRIGRAM_INDEXES:
+                self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+            self.conn.commit()
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            print(f"Warning: could not create trigram search indexes, pg_trgm is unavailable: {e}")
+    
+    @contextmanager
+    def bulk_load_mode(self, drop_indexes=False):
+        """Wrap a bulk import, refreshing the planner statistics once at the end
+        
+        With drop_indexes, the secondary indexes are also dropped for the
+        duration: loading into a table without them and building each index
+        once at the end is cheaper than maintaining every B-tree and GIN index
+        row by row. The web app's eligibility and search queries go without
+        them until the import finishes, so this is opt-in. The indexes are
+        rebuilt even if the import fails.
+        """
+        if drop_indexes:
+            names = [name for name, _ in SECONDARY_INDEXES + TRIGRAM_INDEXES]
+            self.cursor.execute(f"DROP INDEX IF EXISTS {', '.join(names)}")
+            self.conn.commit()
+        try:
+            yield
+        finally:
+            if drop_indexes:
+                print("Rebuilding counselling_data indexes...")
+                self.create_secondary_indexes()
+            
+            # VACUUM sets the visibility map for the freshly loaded pages, so
+            # the covering indexes can answer with index-only scans. It can't
+            # run inside a transaction block.
+            self.conn.commit()
+            self.conn.autocommit = True
+            try:
+                self.cursor.execute('VACUUM ANALYZE counselling_data')
+            finally:
+                self.conn.autocommit = False
     
     def setup_abbreviation_mappings(self):
         """Setup mappings for abbreviations found in PDFs"""
@@ -162,6 +439,12 @@ class NEETPGDataProcessor:
             'ST PwD': 'ST-PwD',
             'Open': 'GENERAL'
         }
+        
+        # Bound lookups for the row parsers, which pass cells that are already
+        # stripped and non-empty: lookup(cell, cell) maps known abbreviations
+        # and passes anything else through, like the normalize_* methods
+        self.quota_lookup = self.quota_mappings.get
+        self.category_lookup = self.category_mappings.get
     
     def normalize_quota(self, quota_str):
         """Normalize quota abbreviation to full form"""
@@ -178,23 +461,54 @@ class NEETPGDataProcessor:
         return self.category_mappings.get(category_str, category_str)
 
     def process_state_quota_pdf(self, pdf_path):
-        """Process State Quota PDF page by page to prevent memory issues"""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                print(f"    Processing page {page_num + 1}/{len(pdf.pages)}")
-                
-                # Extract tables if present
-                tables = page.extract_tables()
-                
-                if tables:
-                    for table in tables:
-                        # Skip header row (index 0)
-                        for row in table[1:]:
-                            if row and len(row) >= 11:  # Ensure we have enough columns
-                                record = self.parse_state_quota_row(row)
-                                if record:
-                                    record['_page_number'] = page_num + 1  # Add page tracking
-                                    yield record
+        """Process State Quota PDF, parsing pages in parallel worker processes"""
+        n_pages = _page_count(pdf_path)
+        
+        yield from self.parse_pages_parallel(pdf_path, n_pages, 'state')
+    
+    def parse_pages_parallel(self, pdf_path, n_pages, file_type, is_multi_round=False, round_number=1, backend='plumber'):
+        """Split a PDF into page ranges, parse them in worker processes and yield records in page order"""
+        workers = max(1, min(self.page_workers, n_pages))
+        if workers == 1 or n_pages < MIN_PAGES_FOR_POOL:
+            yield from _iter_page_range(pdf_path, 0, n_pages, file_type, is_multi_round, round_number, backend)
+            print(f"    Processed pages 1-{n_pages}/{n_pages}")
+            return
+        
+        # Blocks of at most PAGES_PER_TASK pages, smaller for short PDFs so
+        # every worker still gets a share
+        pages_per_task = min(PAGES_PER_TASK, -(-n_pages // workers))
+        page_ranges = [(start, min(start + pages_per_task, n_pages))
+                       for start in range(0, n_pages, pages_per_task)]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map yields results in page order as soon as each block is ready
+            parse_range = partial(_parse_page_range, pdf_path, file_type=file_type,
+                                  is_multi_round=is_multi_round, round_number=round_number,
+                                  backend=backend)
+            starts, ends = zip(*page_ranges)
+            results = executor.map(parse_range, starts, ends)
+            for (start, end), records in zip(page_ranges, results):
+                print(f"    Processed pages {start + 1}-{end}/{n_pages}")
+                yield from records
+    
+    def parse_state_quota_page(self, page, page_number):
+        """Parse all table rows on a State Quota PDF page"""
+        records = []
+        
+        # Extract tables if present
+        tables = page.extract_tables()
+        
+        if tables:
+            for table in tables:
+                # Skip header row (index 0)
+                for row in table[1:]:
+                    if row and len(row) >= 11:  # Ensure we have enough columns
+                        record = self.parse_state_quota_row(row)
+                        if record:
+                            record['_page_number'] = page_number  # Add page tracking
+                            records.append(record)
+        
+        return records
     
     def parse_state_quota_row(self, row):
         """Parse a row from state quota table"""
@@ -209,92 +523,111 @@ class NEETPGDataProcessor:
             if not row or len(row) < 11:
                 return None
             
+            # pdfplumber cells are str or None: strip each one once, and pad
+            # the optional trailing columns so every index below is valid
+            cells = [cell.strip() if cell else '' for cell in row]
+            if len(cells) < 17:
+                cells.extend([''] * (17 - len(cells)))
+            
             record = {}
             
             # Extract state (column 0)
-            if row[0] and str(row[0]).strip():
-                record['state'] = str(row[0]).strip()
+            if cells[0]:
+                record['state'] = cells[0]
             
             # Extract college name (column 1) 
-            if row[1] and str(row[1]).strip():
-                record['college_name'] = str(row[1]).strip()
+            if cells[1]:
+                record['college_name'] = cells[1]
             
             # Extract course (column 2)
-            if row[2] and str(row[2]).strip():
-                course = str(row[2]).strip()
+            course = cells[2]
+            if course:
                 # Normalize course names
                 course = course.replace('MD - ', 'M.D. ').replace('MD/MS - ', 'M.D./M.S. ')
                 record['course'] = course
             
             # Extract student name (column 3)
-            if row[3] and str(row[3]).strip():
-                record['student_name'] = str(row[3]).strip()
+            if cells[3]:
+                record['student_name'] = cells[3]
             
             # Extract gender (column 4)
-            if row[4] and str(row[4]).strip():
-                record['gender'] = str(row[4]).strip()
+            if cells[4]:
+                record['gender'] = cells[4]
             
             # Extract date of birth (column 5)
-            if row[5] and str(row[5]).strip():
-                record['date_of_birth'] = str(row[5]).strip()
+            if cells[5]:
+                record['date_of_birth'] = cells[5]
             
             # Extract quota info (column 6) - "Admitted By"
-            if row[6] and str(row[6]).strip():
-                quota = str(row[6]).strip()
-                record['quota'] = self.normalize_quota(quota) or 'State Quota'
+            if cells[6]:
+                record['quota'] = self.quota_lookup(cells[6], cells[6]) or 'State Quota'
             
             # Extract category (column 7) - "Sub Category"  
-            if row[7] and str(row[7]).strip():
-                category = str(row[7]).strip()
-                record['category'] = self.normalize_category(category)
+            if cells[7]:
+                record['category'] = self.category_lookup(cells[7], cells[7])
             
             # Extract physically handicapped (column 8)
-            if row[8] and str(row[8]).strip():
-                record['physically_handicapped'] = str(row[8]).strip()
+            if cells[8]:
+                record['physically_handicapped'] = cells[8]
             
             # Extract exam name/roll (column 9)
-            if row[9] and str(row[9]).strip():
-                record['exam_name_roll'] = str(row[9]).strip()
+            if cells[9]:
+                record['exam_name_roll'] = cells[9]
             
             # Extract rank from column 10 - "Exam Rank AIR/State Rank"
-            if row[10] and str(row[10]).strip():
-                rank_text = str(row[10]).strip()
-                # Extract numeric rank - could be like "25579" or "94638"
-                rank_match = re.search(r'(\d{4,6})', rank_text)
-                if rank_match:
-                    record['rank'] = int(rank_match.group(1))
+            rank_text = cells[10]
+            if rank_text:
+                # Most ranks are a bare number like "25579"; only fall back to
+                # the regex for cells with surrounding text
+                if rank_text.isdecimal() and 4 <= len(rank_text) <= 6:
+                    record['rank'] = int(rank_text)
+                else:
+                    rank_match = RANK_RE.search(rank_text)
+                    if rank_match:
+                        record['rank'] = int(rank_match.group(1))
             
             # Extract marks (column 11) - "Marks Obtained/Maximum Marks"
-            if row[11] and str(row[11]).strip():
-                marks_text = str(row[11]).strip()
-                marks_match = re.search(r'(\d+)\s*/\s*(\d+)', marks_text)
-                if marks_match:
-                    record['marks_obtained'] = int(marks_match.group(1))
-                    record['max_marks'] = int(marks_match.group(2))
+            marks_text = cells[11]
+            if marks_text:
+                # Usually exactly "obtained/max", which a partition handles;
+                # the regex only sees cells with extra text around the pair
+                obtained, slash, maximum = marks_text.partition('/')
+                obtained, maximum = obtained.rstrip(), maximum.lstrip()
+                if slash and obtained.isdecimal() and maximum.isdecimal():
+                    record['marks_obtained'] = int(obtained)
+                    record['max_marks'] = int(maximum)
+                else:
+                    marks_match = MARKS_RE.search(marks_text)
+                    if marks_match:
+                        record['marks_obtained'] = int(marks_match.group(1))
+                        record['max_marks'] = int(marks_match.group(2))
             
             # Extract PG teacher (column 12)
-            if len(row) > 12 and row[12] and str(row[12]).strip():
-                record['pg_teacher'] = str(row[12]).strip()
+            if cells[12]:
+                record['pg_teacher'] = cells[12]
             
             # Extract stipend amount (column 13)
-            if len(row) > 13 and row[13] and str(row[13]).strip():
-                stipend_text = str(row[13]).strip()
-                # Extract numeric stipend amount
-                stipend_match = re.search(r'(\d+)', stipend_text)
-                if stipend_match:
-                    record['stipend_amount'] = int(stipend_match.group(1))
+            stipend_text = cells[13]
+            if stipend_text:
+                # Extract numeric stipend amount, skipping the regex for bare numbers
+                if stipend_text.isdecimal():
+                    record['stipend_amount'] = int(stipend_text)
+                else:
+                    stipend_match = STIPEND_RE.search(stipend_text)
+                    if stipend_match:
+                        record['stipend_amount'] = int(stipend_match.group(1))
             
             # Extract student registration number (column 14)
-            if len(row) > 14 and row[14] and str(row[14]).strip():
-                record['student_regn_no'] = str(row[14]).strip()
+            if cells[14]:
+                record['student_regn_no'] = cells[14]
             
             # Extract registered council (column 15)
-            if len(row) > 15 and row[15] and str(row[15]).strip():
-                record['registered_council'] = str(row[15]).strip()
+            if cells[15]:
+                record['registered_council'] = cells[15]
             
             # Extract date of admission (column 16)
-            if len(row) > 16 and row[16] and str(row[16]).strip():
-                record['date_of_admission'] = str(row[16]).strip()
+            if cells[16]:
+                record['date_of_admission'] = cells[16]
             
             # Set defaults
             record['year'] = 2024
@@ -307,50 +640,61 @@ class NEETPGDataProcessor:
             print(f"Error parsing state quota row: {e}")
             return None
     
-    def process_all_india_pdf(self, pdf_path):
-        """Process All India Quota PDF page by page to prevent memory issues"""
+    def process_all_india_pdf(self, pdf_path, backend='plumber'):
+        """Process All India Quota PDF, parsing pages in parallel worker processes
+        
+        backend selects the text extractor for pages without tables, one of
+        TEXT_BACKENDS. Tables are always extracted with pdfplumber.
+        """
         # Determine PDF type based on filename and content
         filename = os.path.basename(pdf_path).lower()
         
-        with pdfplumber.open(pdf_path) as pdf:
-            # Check first page to determine format
-            first_page_text = pdf.pages[0].extract_text() or ""
-            
-            # Determine if this is Round 3 multi-round format or single round format
-            is_multi_round = ('Round 1 Round 2' in first_page_text or 
-                             'round 3' in filename and 'final result' in filename.lower())
-            
-            # Determine round number from filename and content
-            round_number = self.extract_round_number(filename)
-            
-            # Override round number based on content
-            if 'stray' in first_page_text.lower():
-                round_number = 5  # Stray rounds are typically Round 5
-            
-            for page_num, page in enumerate(pdf.pages):
-                print(f"    Processing page {page_num + 1}/{len(pdf.pages)}")
-                
-                # Extract tables if present
-                tables = page.extract_tables()
-                
-                if tables:
-                    for table in tables:
-                        if is_multi_round:
-                            # Process multi-round format (Round 3 style)
-                            records = self.parse_multi_round_table(table, round_number, page_num + 1)
-                        else:
-                            # Process single round format (Round 4/5 style)  
-                            records = self.parse_single_round_table(table, round_number, page_num + 1)
-                        
-                        for record in records:
-                            if record:
-                                yield record
+        # Check first page to determine format
+        first_page_text, n_pages = _fast_text(pdf_path, 0)
+        
+        # Determine if this is Round 3 multi-round format or single round format
+        is_multi_round = ('Round 1 Round 2' in first_page_text or 
+                         'round 3' in filename and 'final result' in filename)
+        
+        # Determine round number from filename and content
+        round_number = self.extract_round_number(filename)
+        
+        # Override round number based on content
+        if 'stray' in first_page_text.lower():
+            round_number = 5  # Stray rounds are typically Round 5
+        
+        yield from self.parse_pages_parallel(pdf_path, n_pages, 'all_india', is_multi_round, round_number, backend)
+    
+    def parse_all_india_page(self, page, page_number, is_multi_round, round_number, text_pdf=None):
+        """Parse all records on an All India PDF page
+        
+        text_pdf is an open pypdfium2 document of the same file; when given,
+        pages without tables take their text from PDFium instead of pdfplumber.
+        """
+        records = []
+        
+        # Extract tables if present
+        tables = page.extract_tables()
+        
+        if tables:
+            for table in tables:
+                if is_multi_round:
+                    # Process multi-round format (Round 3 style)
+                    table_records = self.parse_multi_round_table(table, round_number, page_number)
                 else:
-                    # Fallback to text extraction
-                    text = page.extract_text()
-                    records = self.parse_all_india_text(text, round_number, page_num + 1)
-                    for record in records:
-                        yield record
+                    # Process single round format (Round 4/5 style)  
+                    table_records = self.parse_single_round_table(table, round_number, page_number)
+                
+                records.extend(record for record in table_records if record)
+        else:
+            # Fallback to text extraction
+            if text_pdf is not None:
+                text = text_pdf[page_number - 1].get_textpage().get_text_range().replace('\r\n', '\n')
+            else:
+                text = page.extract_text()
+            records.extend(self.parse_all_india_text(text, round_number, page_number))
+        
+        return records
     
     def extract_round_number(self, filename):
         """Extract round number from filename"""
@@ -378,9 +722,9 @@ class NEETPGDataProcessor:
                 continue
             
             # Extract rank from first column
-            rank = None
-            if row[0] and str(row[0]).strip().isdigit():
-                rank = int(str(row[0]).strip())
+            rank_cell = row[0].strip() if row[0] else ''
+            if rank_cell.isdecimal():
+                rank = int(rank_cell)
             else:
                 continue  # Skip if no valid rank
             
@@ -423,44 +767,35 @@ class NEETPGDataProcessor:
     def extract_round_data(self, row, rank, round_num, start_col, end_col):
         """Extract data for a specific round from multi-round row"""
         try:
+            # This round's five columns (quota, college, course, status,
+            # category), each stripped once and padded so indexing is safe
+            cells = [cell.strip() if cell else '' for cell in row[start_col:start_col + 5]]
+            if len(cells) < 5:
+                cells.extend([''] * (5 - len(cells)))
+            quota, college, course, status, category = cells
+            
             # Check if we have data for this round (quota should not be empty)
-            if start_col >= len(row) or not row[start_col] or str(row[start_col]).strip() in ['-', '']:
+            if quota in ('-', ''):
                 return None
                 
             record = {
                 'rank': rank,
                 'round': round_num,
-                'year': 2024
+                'year': 2024,
+                'quota': self.quota_lookup(quota, quota)
             }
             
-            # Extract quota (typically first column of round data)
-            if start_col < len(row) and row[start_col]:
-                quota = str(row[start_col]).strip()
-                record['quota'] = self.normalize_quota(quota)
-            
-            # Extract college (typically second column of round data)
-            if start_col + 1 < len(row) and row[start_col + 1]:
-                college = str(row[start_col + 1]).strip()
-                if college and college not in ['-', '']:
-                    record['college_name'] = college
+            if college and college != '-':
+                record['college_name'] = college
             
-            # Extract course (typically third column of round data)
-            if start_col + 2 < len(row) and row[start_col + 2]:
-                course = str(row[start_col + 2]).strip()
-                if course and course not in ['-', '']:
-                    record['course'] = course
+            if course and course != '-':
+                record['course'] = course
             
-            # Extract status/remarks (typically fourth column of round data)
-            if start_col + 3 < len(row) and row[start_col + 3]:
-                status = str(row[start_col + 3]).strip()
-                if status and status not in ['-', '']:
-                    record['status'] = status
+            if status and status != '-':
+                record['status'] = status
                     
-            # Extract category if available (typically fifth column of round data)
-            if start_col + 4 < len(row) and row[start_col + 4]:
-                category = str(row[start_col + 4]).strip()
-                if category and category not in ['-', '']:
-                    record['category'] = self.normalize_category(category)
+            if category and category != '-':
+                record['category'] = self.category_lookup(category, category)
             
             # Only return record if we have essential data
             if 'college_name' in record and 'course' in record:
@@ -475,48 +810,45 @@ class NEETPGDataProcessor:
     def parse_single_round_row(self, row, round_number):
         """Parse single round format row (Round 4/5 style)"""
         try:
-            record = {
-                'round': round_number,
-                'year': 2024
-            }
+            # Columns: 0 SNo, 1 Rank, 2 Quota, 3 Institute, 4 Course,
+            # 5 Category, 6 Remarks. Strip each cell once and pad the
+            # optional trailing columns.
+            cells = [cell.strip() if cell else '' for cell in row]
+            if len(cells) < 7:
+                cells.extend([''] * (7 - len(cells)))
             
             # Extract rank (column 1)
-            if row[1] and str(row[1]).strip().isdigit():
-                record['rank'] = int(str(row[1]).strip())
-            else:
+            if not cells[1].isdecimal():
                 return None
             
+            record = {
+                'round': round_number,
+                'year': 2024,
+                'rank': int(cells[1])
+            }
+            
             # Extract quota (column 2)
-            if row[2] and str(row[2]).strip():
-                quota = str(row[2]).strip()
-                record['quota'] = self.normalize_quota(quota)
+            if cells[2]:
+                record['quota'] = self.quota_lookup(cells[2], cells[2])
             
             # Extract college (column 3)
-            if row[3] and str(row[3]).strip():
-                college = str(row[3]).strip()
-                record['college_name'] = college
+            if cells[3]:
+                record['college_name'] = cells[3]
             
             # Extract course (column 4)
-            if row[4] and str(row[4]).strip():
-                course = str(row[4]).strip()
-                record['course'] = course
+            if cells[4]:
+                record['course'] = cells[4]
             
-            # Extract category (column 5 or 6)
-            category_col = 5 if len(row) > 5 else None
-            if category_col and category_col < len(row) and row[category_col]:
-                category = str(row[category_col]).strip()
-                if category and category not in ['-', '']:
-                    record['category'] = self.normalize_category(category)
+            # Extract category (column 5)
+            if cells[5] and cells[5] != '-':
+                record['category'] = self.category_lookup(cells[5], cells[5])
             
-            # Extract remarks/status (column 6 or 7)
-            remarks_col = 6 if len(row) > 6 else None
-            if remarks_col and remarks_col < len(row) and row[remarks_col]:
-                status = str(row[remarks_col]).strip()
-                if status and status not in ['-', '']:
-                    record['status'] = status
+            # Extract remarks/status (column 6)
+            if cells[6] and cells[6] != '-':
+                record['status'] = cells[6]
             
             # Only return record if we have essential data
-            if 'rank' in record and 'college_name' in record and 'course' in record:
+            if 'college_name' in record and 'course' in record:
                 return record
                 
             return None
@@ -531,16 +863,15 @@ class NEETPGDataProcessor:
         lines = text.split('\n')
         
         for line in lines:
-            # Pattern for All India entries
-            patterns = [
-                # Pattern for simple format: rank quota college course status
-                r'(\d+)\s+(AI|IP|DU|All India)\s+([^M]+?)(M\.[DS]\..+?)(?:Reported|Not\s+Reported|Seat\s+Surrendered|Allotted)',
-                # Pattern for more complex format
-                r'(\d+)\s+(\w+)\s+(.+?)\s+(M\.[DS]\.\s*.+?)(?:Open|General|OBC|SC|ST|EWS|Allotted)',
-            ]
+            # Entries start with their serial number or rank, and both patterns
+            # need an M.D./M.S. course; these checks reject headers and wrapped
+            # continuation lines before any regex runs
+            if not line[:1].isdigit() or 'M.' not in line:
+                continue
             
-            for pattern in patterns:
-                match = re.search(pattern, line)
+            # Pattern for All India entries
+            for pattern in ALL_INDIA_TEXT_PATTERNS:
+                match = pattern.search(line)
                 if match:
                     record = {
                         'rank': int(match.group(1)),
@@ -557,165 +888,167 @@ class NEETPGDataProcessor:
         return records
     
     def insert_records_with_verification(self, records, processed_file_id, enable_verification=False, sample_rate=0.1):
-        """Insert records and optionally create verification records for sampling"""
-        batch_size = 100
+        """Insert records and optionally create verification records for sampling
+        
+        records can be any iterable, including a parser generator; only one
+        batch is held at a time. The rows are committed once, after the last
+        batch.
+        """
+        if not enable_verification:
+            return self.insert_records(records)
+        
+        total_inserted, sample = self.insert_records_sampled(records, sample_rate)
+        self.conn.commit()
+        
+        # Insert verification records if any
+        if sample:
+            self.insert_verification_records([
+                {'counselling_data_id': record_id, 'processed_file_id': processed_file_id, 'page_number': page_number}
+                for record_id, page_number in sample
+            ])
+            print(f"  Created {len(sample)} verification records for sampling")
+        
+        return total_inserted
+    
+    def insert_records_sampled(self, records, sample_rate=0.1):
+        """Insert records, returning the new ids of a sample of them
+        
+        Each inserted row that has a page number is sampled independently with
+        probability sample_rate, so the sample isn't tied to page order. The gap
+        to the next sampled row is drawn from the matching geometric
+        distribution, so there is one random draw per sampled row rather than
+        one per row. Returns (total_inserted, [(counselling_data_id,
+        page_number), ...]). Nothing is committed; records are batched as in
+        insert_records.
+        """
+        batch_size = 10000
         total_inserted = 0
         total_skipped = 0
-        verification_records = []
-        
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
+        processed = 0
+        sample = []
+        
+        # Number of eligible rows to pass over before the next sampled one;
+        # a rate of zero or below samples nothing
+        if sample_rate <= 0:
+            next_gap = lambda: math.inf
+        elif sample_rate >= 1:
+            next_gap = lambda: 0
+        else:
+            log_keep = math.log(1.0 - sample_rate)
+            next_gap = lambda: int(math.log(1.0 - random.random()) / log_keep)
+        gap = next_gap()
+        
+        records = iter(records)
+        while batch := list(islice(records, batch_size)):
+            rows = list(map(counselling_row, batch))
+            processed += len(rows)
             batch_inserted = 0
             batch_skipped = 0
             
-            for record in batch:
-                try:
-                    # Insert main record
-                    self.cursor.execute('''
-                    INSERT INTO counselling_data 
-                    (year, round, rank, quota, state, college_name, course, 
-                     category, sub_category, gender, physically_handicapped, 
-                     marks_obtained, max_marks, status, date_of_admission,
-                     student_name, date_of_birth, exam_name_roll, pg_teacher,
-                     stipend_amount, student_regn_no, registered_council)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                    ''', (
-                        record.get('year', 2024),
-                        record.get('round', 1),
-                        record.get('rank'),
-                        record.get('quota'),
-                        record.get('state'),
-                        record.get('college_name'),
-                        record.get('course'),
-                        record.get('category'),
-                        record.get('sub_category'),
-                        record.get('gender'),
-                        record.get('physically_handicapped'),
-                        record.get('marks_obtained'),
-                        record.get('max_marks'),
-                        record.get('status'),
-                        record.get('date_of_admission'),
-                        record.get('student_name'),
-                        record.get('date_of_birth'),
-                        record.get('exam_name_roll'),
-                        record.get('pg_teacher'),
-                        record.get('stipend_amount'),
-                        record.get('student_regn_no'),
-                        record.get('registered_council')
-                    ))
-                    
-                    record_id = self.cursor.fetchone()[0]
-                    batch_inserted += 1
-                    
-                    # Create verification record if enabled and sampling matches
-                    if enable_verification and record.get('_page_number') and (len(verification_records) == 0 or 
-                        (batch_inserted + total_inserted) % int(1/sample_rate) == 0):
-                        verification_records.append({
-                            'counselling_data_id': record_id,
-                            'processed_file_id': processed_file_id,
-                            'page_number': record.get('_page_number')
-                        })
-                        
-                except psycopg2.IntegrityError:
+            # New counselling_data id for each row, None where it was a duplicate
+            row_ids = self.copy_counselling_rows_returning(rows)
+            
+            for record, record_id in zip(batch, row_ids):
+                if record_id is None:
                     batch_skipped += 1
                     continue
+                batch_inserted += 1
+                
+                page_number = record.get('_page_number')
+                if not page_number:
+                    continue
+                if gap:
+                    gap -= 1
+                else:
+                    sample.append((record_id, page_number))
+                    gap = next_gap()
             
-            # Commit batch
-            self.conn.commit()
             total_inserted += batch_inserted
             total_skipped += batch_skipped
             
-            # Progress update
-            if len(records) > batch_size:
-                progress = min((i + batch_size) / len(records) * 100, 100)
-                print(f"  Progress: {progress:.1f}% - Batch: {batch_inserted} inserted, {batch_skipped} skipped")
-        
-        # Insert verification records if any
-        if verification_records and enable_verification:
-            self.insert_verification_records(verification_records)
-            print(f"  Created {len(verification_records)} verification records for sampling")
+            # Progress update, unless everything fit in one batch
+            if processed > batch_size or len(batch) == batch_size:
+                print(f"  Progress: {processed} records - Batch: {batch_inserted} inserted, {batch_skipped} skipped")
         
         print(f"  Total: {total_inserted} records inserted, {total_skipped} duplicates skipped")
-        return total_inserted
+        return total_inserted, sample
+    
+    def copy_counselling_rows_returning(self, rows):
+        """COPY rows through the staging table and return the new id for each
+        row, in order, with None for rows skipped as duplicates"""
+        self.stage_counselling_rows(rows)
+        self.cursor.execute(MERGE_COUNSELLING_STAGE_RETURNING_SQL)
+        return match_returned_ids(rows, self.cursor.fetchall())
     
     def insert_verification_records(self, verification_records):
         """Insert verification records in batch"""
-        for vr in verification_records:
-            try:
-                self.cursor.execute('''
-                INSERT INTO verification_records 
-                (counselling_data_id, processed_file_id, page_number)
-                VALUES (%s, %s, %s)
-                ''', (vr['counselling_data_id'], vr['processed_file_id'], vr['page_number']))
-            except Exception as e:
-                print(f"Error inserting verification record: {e}")
+        rows = [(vr['counselling_data_id'], vr['processed_file_id'], vr['page_number'])
+                for vr in verification_records]
+        try:
+            execute_values(self.cursor, '''
+            INSERT INTO verification_records 
+            (counselling_data_id, processed_file_id, page_number)
+            VALUES %s
+            ''', rows)
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error inserting verification records: {e}")
+            return
         self.conn.commit()
     
     def insert_records(self, records):
-        """Insert records into database in batches to prevent memory issues"""
-        batch_size = 100
+        """Insert records into database in batches to prevent memory issues
+        
+        records can be any iterable, including a parser generator; only one
+        batch is held at a time. Batches go through copy_counselling_rows,
+        which skips duplicates server-side. Everything is committed once at
+        the end.
+        """
+        batch_size = 10000
         total_inserted = 0
         total_skipped = 0
+        processed = 0
         
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            batch_inserted = 0
-            batch_skipped = 0
+        records = iter(records)
+        while batch := list(islice(records, batch_size)):
+            rows = list(map(counselling_row, batch))
+            processed += len(rows)
             
-            for record in batch:
-                try:
-                    self.cursor.execute('''
-                    INSERT INTO counselling_data 
-                    (year, round, rank, quota, state, college_name, course, 
-                     category, sub_category, gender, physically_handicapped, 
-                     marks_obtained, max_marks, status, date_of_admission,
-                     student_name, date_of_birth, exam_name_roll, pg_teacher,
-                     stipend_amount, student_regn_no, registered_council)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ''', (
-                        record.get('year', 2024),
-                        record.get('round', 1),
-                        record.get('rank'),
-                        record.get('quota'),
-                        record.get('state'),
-                        record.get('college_name'),
-                        record.get('course'),
-                        record.get('category'),
-                        record.get('sub_category'),
-                        record.get('gender'),
-                        record.get('physically_handicapped'),
-                        record.get('marks_obtained'),
-                        record.get('max_marks'),
-                        record.get('status'),
-                        record.get('date_of_admission'),
-                        record.get('student_name'),
-                        record.get('date_of_birth'),
-                        record.get('exam_name_roll'),
-                        record.get('pg_teacher'),
-                        record.get('stipend_amount'),
-                        record.get('student_regn_no'),
-                        record.get('registered_council')
-                    ))
-                    batch_inserted += 1
-                except psycopg2.IntegrityError:
-                    batch_skipped += 1
-                    continue
-            
-            # Commit batch
-            self.conn.commit()
+            batch_inserted, _ = self.copy_counselling_rows(rows)
+            batch_skipped = len(rows) - batch_inserted
             total_inserted += batch_inserted
             total_skipped += batch_skipped
             
-            # Progress update
-            if len(records) > batch_size:
-                progress = min((i + batch_size) / len(records) * 100, 100)
-                print(f"  Progress: {progress:.1f}% - Batch: {batch_inserted} inserted, {batch_skipped} skipped")
+            # Progress update, unless everything fit in one batch
+            if processed > batch_size or len(batch) == batch_size:
+                print(f"  Progress: {processed} records - Batch: {batch_inserted} inserted, {batch_skipped} skipped")
         
+        self.conn.commit()
         print(f"  Total: {total_inserted} records inserted, {total_skipped} duplicates skipped")
         return total_inserted
     
-    def process_pdf_file(self, pdf_path, file_type='state', enable_verification=False, sample_rate=0.1):
+    def stage_counselling_rows(self, rows):
+        """Replace the staging table's contents with rows, streamed with COPY
+        
+        rows can be any iterable, including a generator; it is consumed as
+        the server reads. Returns the number of rows copied.
+        """
+        # Created on every call, in the same round-trip as the TRUNCATE: a
+        # rolled-back transaction also drops a temp table created inside it
+        stream = CSVRowStream(rows)
+        self.cursor.execute(CREATE_COUNSELLING_STAGE_SQL + ';\nTRUNCATE counselling_stage')
+        self.cursor.copy_expert(COPY_COUNSELLING_STAGE_SQL, stream)
+        return stream.row_count
+    
+    def copy_counselling_rows(self, rows):
+        """Stream rows with COPY into the staging table, then move them into
+        counselling_data with ON CONFLICT DO NOTHING. Returns (inserted, copied) counts."""
+        copied = self.stage_counselling_rows(rows)
+        self.cursor.execute(MERGE_COUNSELLING_STAGE_SQL)
+        return self.cursor.rowcount, copied
+    
+    def process_pdf_file(self, pdf_path, file_type='state', enable_verification=False, sample_rate=0.1, backend='plumber',
+                         refresh_stats=True):
         """Main method to process any PDF file
         
         Args:
@@ -723,6 +1056,10 @@ class NEETPGDataProcessor:
             file_type (str): Format type - 'state' for state quota format, 'all_india' for All India quota format
             enable_verification (bool): Whether to create verification records for sampling
             sample_rate (float): Fraction of records to include in verification sampling (0.1 = 10%)
+            backend (str): Text extractor for All India pages without tables - 'plumber' or 'pypdfium'
+            refresh_stats (bool): ANALYZE counselling_data after inserting.
+                Imports under bulk_load_mode pass False; it analyzes once at
+                the end.
         """
         print(f"Processing file: {pdf_path}")
         print(f"Using format: {file_type}")
@@ -742,96 +1079,79 @@ class NEETPGDataProcessor:
             return []
         
         # Validate file_type parameter
-        if file_type not in ['state', 'all_india']:
+        if file_type not in FILE_TYPES:
             print(f"Invalid file_type: {file_type}. Must be 'state' or 'all_india'")
             return []
         
+        if backend not in TEXT_BACKENDS:
+            print(f"Invalid backend: {backend}. Must be 'plumber' or 'pypdfium'")
+            return []
+        
         # Process based on type and insert in batches
         try:
             if file_type == 'state':
                 record_generator = self.process_state_quota_pdf(pdf_path)
             else:
-                record_generator = self.process_all_india_pdf(pdf_path)
-            
-            # Process records in batches to prevent memory issues
-            batch_size = 100
-            current_batch = []
-            total_records = 0
-            
-            for record in record_generator:
-                current_batch.append(record)
-                
-                # When batch is full, insert and commit
-                if len(current_batch) >= batch_size:
-                    inserted_count = self.insert_records(current_batch)
-                    total_records += inserted_count
-                    current_batch = []
-                    print(f"    Batch processed: {inserted_count} records inserted")
+                record_generator = self.process_all_india_pdf(pdf_path, backend)
             
-            # Insert remaining records in the last batch
-            if current_batch:
-                inserted_count = self.insert_records(current_batch)
-                total_records += inserted_count
-                print(f"    Final batch processed: {inserted_count} records inserted")
+            if enable_verification:
+                # Sample the inserted rows' ids on the way in, so verification
+                # needs neither a second parse nor an id lookup afterwards
+                print(f"Creating verification records with {sample_rate*100:.1f}% sampling rate...")
+                total_records, sample = self.insert_records_sampled(record_generator, sample_rate)
+            else:
+                # One COPY for the whole file, fed straight from the parser
+                # and committed together with its processed_files entry below
+                total_records, parsed = self.copy_counselling_rows(map(counselling_row, record_generator))
+                print(f"  Total: {total_records} records inserted, {parsed - total_records} duplicates skipped")
             
             # Log processed file and get ID for verification records
             if total_records > 0:
+                # Refresh planner statistics so the new rows are costed correctly
+                if refresh_stats:
+                    self.cursor.execute('ANALYZE counselling_data')
+                
                 self.cursor.execute('''
                 INSERT INTO processed_files (filename, file_type, records_count, sample_size)
                 VALUES (%s, %s, %s, %s)
                 RETURNING id
-                ''', (filename, file_type, total_records, int(total_records * sample_rate) if enable_verification else None))
+                ''', (filename, file_type, total_records, len(sample) if enable_verification else None))
                 processed_file_id = self.cursor.fetchone()[0]
                 
-                # If verification is enabled, process records again with verification
+                if enable_verification and sample:
+                    execute_values(self.cursor, '''
+                    INSERT INTO verification_records 
+                    (counselling_data_id, processed_file_id, page_number)
+                    VALUES %s
+                    ''', [(record_id, processed_file_id, page_number) for record_id, page_number in sample],
+                    page_size=len(sample))
+                
+                self.conn.commit()
+                
                 if enable_verification:
-                    print(f"Creating verification records with {sample_rate*100:.1f}% sampling rate...")
-                    # Re-process for verification records
-                    verification_count = 0
-                    if file_type == 'state':
-                        record_generator = self.process_state_quota_pdf(pdf_path)
-                    else:
-                        record_generator = self.process_all_india_pdf(pdf_path)
-                    
-                    # Collect all records first to sample properly
-                    all_records = list(record_generator)
-                    sample_indices = list(range(0, len(all_records), int(1/sample_rate)))
-                    
-                    # Get counselling_data IDs for sampled records
-                    for idx in sample_indices:
-                        if idx < len(all_records):
-                            record = all_records[idx]
-                            # Find the counselling_data record ID
-                            self.cursor.execute('''
-                            SELECT id FROM counselling_data 
-                            WHERE rank = %s AND college_name = %s AND course = %s 
-                            ORDER BY id DESC LIMIT 1
-                            ''', (record.get('rank'), record.get('college_name'), record.get('course')))
-                            
-                            result = self.cursor.fetchone()
-                            if result and record.get('_page_number'):
-                                self.cursor.execute('''
-                                INSERT INTO verification_records 
-                                (counselling_data_id, processed_file_id, page_number)
-                                VALUES (%s, %s, %s)
-                                ''', (result[0], processed_file_id, record.get('_page_number')))
-                                verification_count += 1
-                    
-                    self.conn.commit()
-                    print(f"Created {verification_count} verification records for sampling")
+                    print(f"Created {len(sample)} verification records for sampling")
                 
                 print(f"Successfully processed {total_records} records from {filename}")
                 return total_records
             else:
+                self.conn.commit()
                 print(f"No records found in {filename}")
                 return 0
                 
+        except psycopg2.errors.DeadlockDetected:
+            # A parallel worker's file holds some of the same natural keys;
+            # _process_one_pdf retries the whole file
+            self.conn.rollback()
+            raise
         except Exception as e:
+            # Leave the connection usable for the next file
+            self.conn.rollback()
             print(f"Error processing {pdf_path}: {e}")
             return 0
     
     def get_eligible_colleges(self, rank, category=None, quota=None):
         """Get eligible colleges based on rank"""
+        # idx_elig_cover leads with rank and covers every selected column
         query = '''
         SELECT DISTINCT college_name, course, quota, rank as cutoff_rank, 
                category, round, year
@@ -877,36 +1197,50 @@ class NEETPGDataProcessor:
         self.cursor.execute(query, params)
         return self.cursor.fetchall()
     
-    def get_statistics(self):
-        """Get database statistics"""
-        stats = {}
-        
-        # Total records
-        self.cursor.execute('SELECT COUNT(*) FROM counselling_data')
-        stats['total_records'] = self.cursor.fetchone()[0]
-        
-        # Records by quota
-        self.cursor.execute('''
-        SELECT quota, COUNT(*) FROM counselling_data 
-        GROUP BY quota
-        ''')
-        stats['by_quota'] = dict(self.cursor.fetchall())
-        
-        # Records by category
-        self.cursor.execute('''
-        SELECT category, COUNT(*) FROM counselling_data 
-        WHERE category IS NOT NULL
-        GROUP BY category
-        ''')
-        stats['by_category'] = dict(self.cursor.fetchall())
+    def get_statistics(self, exact=True, fields=STATISTICS_FIELDS):
+        """Get database statistics
+        
+        With exact=False the totals are the planner's estimates from the last
+        ANALYZE (run after every import), read from the
+        catalog without scanning counselling_data, and the per-quota and
+        per-category breakdowns are left empty. fields limits an exact query
+        to the named entries of STATISTICS_FIELDS, e.g. ('total_records',)
+        when only the row count is needed.
+        """
+        if not exact:
+            # n_distinct is negative when it is a fraction of the row count;
+            # reltuples is -1 for a table that has never been analyzed
+            self.cursor.execute('''
+            SELECT GREATEST(c.reltuples, 0)::bigint,
+                   COALESCE(MAX(CASE WHEN s.attname = 'college_name' THEN s.n_distinct END), 0),
+                   COALESCE(MAX(CASE WHEN s.attname = 'course' THEN s.n_distinct END), 0)
+            FROM pg_class c
+            LEFT JOIN pg_stats s ON s.schemaname = 'public' AND s.tablename = c.relname
+                                AND s.attname IN ('college_name', 'course')
+            WHERE c.oid = 'counselling_data'::regclass
+            GROUP BY c.reltuples
+            ''')
+            total, colleges, courses = self.cursor.fetchone()
+            stats = {
+                'total_records': total,
+                'by_quota': {},
+                'by_category': {},
+                'unique_colleges': round(colleges if colleges >= 0 else -colleges * total),
+                'unique_courses': round(courses if courses >= 0 else -courses * total)
+            }
+            return {field: stats[field] for field in fields}
         
-        # Unique colleges
-        self.cursor.execute('SELECT COUNT(DISTINCT college_name) FROM counselling_data')
-        stats['unique_colleges'] = self.cursor.fetchone()[0]
+        # All requested counts in one round-trip
+        self.cursor.execute(
+            f"SELECT {', '.join(STATISTICS_FIELDS[field] for field in fields)} FROM counselling_data"
+        )
+        stats = dict(zip(fields, self.cursor.fetchone()))
         
-        # Unique courses
-        self.cursor.execute('SELECT COUNT(DISTINCT course) FROM counselling_data')
-        stats['unique_courses'] = self.cursor.fetchone()[0]
+        # The grouped counts come back as [key, count] pairs so a NULL quota
+        # survives as a None key
+        for field in ('by_quota', 'by_category'):
+            if field in stats:
+                stats[field] = dict(stats[field] or [])
         
         return stats
     
@@ -929,41 +1263,35 @@ class NEETPGDataProcessor:
         for category, count in stats['by_category'].items():
             print(f"  {category}: {count}")
         
-        # Round-wise distribution
-        print(f"\n=== Distribution by Round ===")
+        # Round distribution and field completeness in one scan; COUNT(column)
+        # counts the non-NULL values
         self.cursor.execute('''
-        SELECT round, COUNT(*) as count 
-        FROM counselling_data 
-        GROUP BY round 
-        ORDER BY round
+        SELECT COUNT(rank), COUNT(college_name), COUNT(course),
+               COUNT(student_name), COUNT(pg_teacher),
+               (SELECT json_agg(json_build_array(round, n) ORDER BY round) FROM (
+                   SELECT round, COUNT(*) AS n FROM counselling_data 
+                   GROUP BY round
+               ) r)
+        FROM counselling_data
         ''')
+        (rank_complete, college_complete, course_complete,
+         name_complete, teacher_complete, by_round) = self.cursor.fetchone()
         
-        for round_num, count in self.cursor.fetchall():
+        # Round-wise distribution
+        print(f"\n=== Distribution by Round ===")
+        for round_num, count in by_round or []:
             print(f"  Round {round_num}: {count}")
         
         # Data completeness check
         print(f"\n=== Data Completeness ===")
         
         # Essential fields
-        self.cursor.execute('SELECT COUNT(*) FROM counselling_data WHERE rank IS NOT NULL')
-        rank_complete = self.cursor.fetchone()[0]
         print(f"Records with rank: {rank_complete}/{stats['total_records']} ({rank_complete/stats['total_records']*100:.1f}%)")
-        
-        self.cursor.execute('SELECT COUNT(*) FROM counselling_data WHERE college_name IS NOT NULL')
-        college_complete = self.cursor.fetchone()[0]
         print(f"Records with college: {college_complete}/{stats['total_records']} ({college_complete/stats['total_records']*100:.1f}%)")
-        
-        self.cursor.execute('SELECT COUNT(*) FROM counselling_data WHERE course IS NOT NULL')
-        course_complete = self.cursor.fetchone()[0]
         print(f"Records with course: {course_complete}/{stats['total_records']} ({course_complete/stats['total_records']*100:.1f}%)")
         
         # State-specific fields
-        self.cursor.execute('SELECT COUNT(*) FROM counselling_data WHERE student_name IS NOT NULL')
-        name_complete = self.cursor.fetchone()[0]
         print(f"Records with student name: {name_complete}/{stats['total_records']} ({name_complete/stats['total_records']*100:.1f}%)")
-        
-        self.cursor.execute('SELECT COUNT(*) FROM counselling_data WHERE pg_teacher IS NOT NULL')
-        teacher_complete = self.cursor.fetchone()[0]
         print(f"Records with PG teacher: {teacher_complete}/{stats['total_records']} ({teacher_complete/stats['total_records']*100:.1f}%)")
         
         # Sample records from each type
@@ -1026,51 +1354,49 @@ class NEETPGDataProcessor:
         # Check for missing critical fields in state data
         print("\n=== Missing Field Analysis ===")
         
-        # Check state records with missing fields
+        # Missing fields, rank ranges and the category distribution in one
+        # scan of the State and All India rows
         self.cursor.execute('''
-        SELECT COUNT(*) FROM counselling_data 
-        WHERE quota = 'State Quota' AND student_name IS NULL
+        SELECT COUNT(*) FILTER (WHERE quota = 'State Quota' AND student_name IS NULL),
+               COUNT(*) FILTER (WHERE quota = 'State Quota' AND date_of_birth IS NULL),
+               COUNT(*) FILTER (WHERE quota = 'State Quota' AND pg_teacher IS NULL),
+               COUNT(*) FILTER (WHERE quota = 'State Quota' AND stipend_amount IS NULL),
+               MIN(rank) FILTER (WHERE quota = 'State Quota'),
+               MAX(rank) FILTER (WHERE quota = 'State Quota'),
+               AVG(rank) FILTER (WHERE quota = 'State Quota'),
+               MIN(rank) FILTER (WHERE quota = 'All India'),
+               MAX(rank) FILTER (WHERE quota = 'All India'),
+               AVG(rank) FILTER (WHERE quota = 'All India'),
+               (SELECT json_agg(json_build_array(category, n) ORDER BY n DESC) FROM (
+                   SELECT category, COUNT(*) AS n FROM counselling_data 
+                   WHERE quota = 'State Quota'
+                   GROUP BY category
+               ) c)
+        FROM counselling_data 
+        WHERE quota IN ('State Quota', 'All India')
         ''')
-        missing_names = self.cursor.fetchone()[0]
-        print(f"State records missing student names: {missing_names}")
+        (missing_names, missing_dob, missing_teacher, missing_stipend,
+         min_rank, max_rank, avg_rank, ai_min, ai_max, ai_avg,
+         state_categories) = self.cursor.fetchone()
         
-        self.cursor.execute('''
-        SELECT COUNT(*) FROM counselling_data 
-        WHERE quota = 'State Quota' AND date_of_birth IS NULL
-        ''')
-        missing_dob = self.cursor.fetchone()[0]
+        print(f"State records missing student names: {missing_names}")
         print(f"State records missing date of birth: {missing_dob}")
-        
-        self.cursor.execute('''
-        SELECT COUNT(*) FROM counselling_data 
-        WHERE quota = 'State Quota' AND pg_teacher IS NULL
-        ''')
-        missing_teacher = self.cursor.fetchone()[0]
         print(f"State records missing PG teacher: {missing_teacher}")
-        
-        self.cursor.execute('''
-        SELECT COUNT(*) FROM counselling_data 
-        WHERE quota = 'State Quota' AND stipend_amount IS NULL
-        ''')
-        missing_stipend = self.cursor.fetchone()[0]
         print(f"State records missing stipend: {missing_stipend}")
         
         # Check course normalization issues
         print(f"\n=== Course Name Analysis ===")
+        # Count the distinct courses and pick out un-normalized ones server-side,
+        # rather than pulling every course name across
         self.cursor.execute('''
-        SELECT DISTINCT course FROM counselling_data 
+        SELECT COUNT(DISTINCT course),
+               array_agg(DISTINCT course ORDER BY course)
+                   FILTER (WHERE course LIKE '%MD - %' OR course LIKE '%MD/MS - %')
+        FROM counselling_data 
         WHERE quota = 'State Quota'
-        ORDER BY course
         ''')
-        
-        state_courses = self.cursor.fetchall()
-        print(f"Number of unique courses in state data: {len(state_courses)}")
-        
-        # Check for inconsistencies
-        problematic_courses = []
-        for (course,) in state_courses:
-            if course and ('MD - ' in course or 'MD/MS - ' in course):
-                problematic_courses.append(course)
+        unique_courses, problematic_courses = self.cursor.fetchone()
+        print(f"Number of unique courses in state data: {unique_courses}")
         
         if problematic_courses:
             print(f"\n❌ Found {len(problematic_courses)} courses with inconsistent naming:")
@@ -1083,57 +1409,38 @@ class NEETPGDataProcessor:
         
         # Check category consistency  
         print(f"\n=== Category Analysis ===")
-        self.cursor.execute('''
-        SELECT category, COUNT(*) FROM counselling_data 
-        WHERE quota = 'State Quota'
-        GROUP BY category 
-        ORDER BY COUNT(*) DESC
-        ''')
-        
-        state_categories = self.cursor.fetchall()
         print("Category distribution in state data:")
-        for category, count in state_categories:
+        for category, count in state_categories or []:
             print(f"  {category}: {count}")
         
         # Check rank ranges
         print(f"\n=== Rank Range Analysis ===")
-        self.cursor.execute('''
-        SELECT MIN(rank), MAX(rank), AVG(rank) FROM counselling_data 
-        WHERE quota = 'State Quota'
-        ''')
-        
-        result = self.cursor.fetchone()
-        if result and result[0]:
-            min_rank, max_rank, avg_rank = result
+        if min_rank:
             print(f"State quota rank range: {min_rank} to {max_rank}")
             print(f"Average rank: {avg_rank:.0f}")
         
         # Compare with All India ranks
-        self.cursor.execute('''
-        SELECT MIN(rank), MAX(rank), AVG(rank) FROM counselling_data 
-        WHERE quota = 'All India'
-        ''')
-        
-        ai_result = self.cursor.fetchone()
-        if ai_result and ai_result[0]:
-            ai_min, ai_max, ai_avg = ai_result
+        if ai_min:
             print(f"All India rank range: {ai_min} to {ai_max}")
             print(f"Average rank: {ai_avg:.0f}")
         
         # Check for duplicates
         print(f"\n=== Duplicate Analysis ===")
+        # Only the top three are shown, so only they come back, each carrying
+        # the total number of duplicated names
         self.cursor.execute('''
-        SELECT student_name, COUNT(*) as cnt FROM counselling_data 
+        SELECT student_name, COUNT(*) as cnt, COUNT(*) OVER () FROM counselling_data 
         WHERE student_name IS NOT NULL
         GROUP BY student_name 
         HAVING COUNT(*) > 1
         ORDER BY cnt DESC
+        LIMIT 3
         ''')
         
         duplicates = self.cursor.fetchall()
         if duplicates:
-            print(f"❌ Found {len(duplicates)} duplicate student names:")
-            for name, count in duplicates[:3]:
+            print(f"❌ Found {duplicates[0][2]} duplicate student names:")
+            for name, count, _ in duplicates:
                 print(f"  {name}: {count} records")
         else:
             print("✅ No duplicate student names found")
@@ -1238,8 +1545,12 @@ class NEETPGDataProcessor:
         print("To import with verification: python pdf_uploader.py import <file> <format> --verify")
         print("To create samples for existing files: Use the web interface at /admin/verification")
     
-    def batch_import_pdfs(self, pdfs_dir, pdf_files=None):
-        """Import multiple PDFs from a directory with progress tracking"""
+    def batch_import_pdfs(self, pdfs_dir, pdf_files=None, drop_indexes=False):
+        """Import multiple PDFs from a directory with progress tracking
+        
+        drop_indexes drops the secondary indexes during the import and
+        rebuilds them at the end (see bulk_load_mode).
+        """
         if pdf_files is None:
             pdf_files = [
                 '104. Round 3 Final Result_XENMENTOR (1).pdf',
@@ -1251,55 +1562,67 @@ class NEETPGDataProcessor:
         print(f"=== Batch PDF Import from {pdfs_dir} ===")
         
         # Get initial statistics
-        stats_initial = self.get_statistics()
+        stats_initial = self.get_statistics(fields=('total_records',))
         print(f"Initial records in database: {stats_initial['total_records']}")
         print()
         
         successful_imports = 0
         total_new_records = 0
+        # Running row count; process_pdf_file returns the rows it actually
+        # inserted, so the table doesn't need re-counting after every file
+        db_records = stats_initial['total_records']
         
+        jobs = []
         for pdf_file in pdf_files:
             pdf_path = os.path.join(pdfs_dir, pdf_file)
             
-            print(f"=== Processing: {pdf_file} ===")
-            
             if not os.path.exists(pdf_path):
                 print(f"❌ File not found: {pdf_path}")
                 continue
-                
-            try:
-                # Get stats before import
-                stats_before = self.get_statistics()
-                
-                # Determine file format based on filename
-                if 'round' in pdf_file.lower() or 'result' in pdf_file.lower():
-                    file_format = 'all_india'
-                else:
-                    file_format = 'state'
-                
-                print(f"Using format: {file_format}")
-                
-                # Process the PDF file
-                total_records = self.process_pdf_file(pdf_path, file_format)
-                
-                if total_records > 0:
-                    print(f"✅ Successfully imported {total_records} records from {pdf_file}")
-                    successful_imports += 1
-                    total_new_records += total_records
-                else:
-                    print(f"⚠️ No new records imported from {pdf_file}")
-                    
-                # Get stats after import
-                stats_after = self.get_statistics()
-                records_added = stats_after['total_records'] - stats_before['total_records']
-                print(f"Database records: {stats_after['total_records']} (net added: {records_added})")
-                print()
+            
+            # Determine file format based on filename
+            pdf_file_lower = pdf_file.lower()
+            if any(marker in pdf_file_lower for marker in ALL_INDIA_FILENAME_MARKERS):
+                file_format = 'all_india'
+            else:
+                file_format = 'state'
+            jobs.append((pdf_file, pdf_path, file_format))
+        
+        if jobs:
+            # As in process_all_pdfs_in_folder: one worker process and
+            # connection per file, largest first, with the cores split between
+            # the files' page pools and the indexes rebuilt once at the end
+            jobs.sort(key=lambda job: os.path.getsize(job[1]), reverse=True)
+            cpus = os.cpu_count() or 1
+            file_workers = min(cpus, len(jobs))
+            page_workers = max(1, cpus // file_workers)
+            
+            with self.bulk_load_mode(drop_indexes), ProcessPoolExecutor(max_workers=file_workers) as executor:
+                futures = [
+                    executor.submit(_process_one_pdf, pdf_path, file_format, page_workers)
+                    for _, pdf_path, file_format in jobs
+                ]
+                for (pdf_file, _, file_format), future in zip(jobs, futures):
+                    print(f"=== Processed: {pdf_file} ({file_format}) ===")
+                    try:
+                        total_records = future.result()
+                        
+                        if total_records > 0:
+                            print(f"✅ Successfully imported {total_records} records from {pdf_file}")
+                            successful_imports += 1
+                            total_new_records += total_records
+                        else:
+                            print(f"⚠️ No new records imported from {pdf_file}")
+                        
+                        db_records += total_records
+                        print(f"Database records: {db_records} (net added: {total_records})")
+                        print()
                     
-            except Exception as e:
-                print(f"❌ Error importing {pdf_file}: {e}")
-                import traceback
-                traceback.print_exc()
-                print()
+                    except Exception as e:
+                        print(f"❌ Error importing {pdf_file}: {e}")
+                        import traceback
+                        traceback.print_exc()
+                        print()
         
         # Final statistics
         stats_final = self.get_statistics()
@@ -1346,20 +1669,25 @@ class NEETPGDataProcessor:
         print(f"Data exported to {output_file}")
         return data
     
-    def process_all_pdfs_in_folder(self, folder_path='pdfs', file_type='state'):
+    def process_all_pdfs_in_folder(self, folder_path='pdfs', file_type='state', drop_indexes=False):
         """Process all PDF files in the specified folder with explicit format
         
         Args:
             folder_path (str): Path to folder containing PDFs
             file_type (str): Format type - 'state' for state quota format, 'all_india' for All India quota format
+            drop_indexes (bool): Drop the secondary indexes during the import
+                and rebuild them at the end (see bulk_load_mode)
         """
         if not os.path.exists(folder_path):
             print(f"Folder {folder_path} does not exist")
             return {}
         
-        # Get all PDF files in the folder
-        pdf_pattern = os.path.join(folder_path, '*.pdf')
-        pdf_files = glob.glob(pdf_pattern)
+        # Get all PDF files in the folder (what glob's '*.pdf' matched, minus
+        # directories); scandir's entries know their type without a stat
+        with os.scandir(folder_path) as entries:
+            pdf_files = [entry.path for entry in entries
+                         if entry.name.endswith('.pdf') and not entry.name.startswith('.')
+                         and entry.is_file()]
         
         if not pdf_files:
             print(f"No PDF files found in {folder_path}")
@@ -1371,21 +1699,55 @@ class NEETPGDataProcessor:
         processing_results = {}
         total_records = 0
         
+        # Skip files imported by an earlier run with one query here, rather
+        # than a round-trip per file in the workers
+        self.cursor.execute('SELECT filename FROM processed_files')
+        processed = {filename for (filename,) in self.cursor.fetchall()}
+        pending = []
         for pdf_file in pdf_files:
-            try:
-                records = self.process_pdf_file(pdf_file, file_type)
-                processing_results[os.path.basename(pdf_file)] = {
-                    'records_count': len(records) if records else 0,
-                    'status': 'success' if records else 'no_data'
-                }
-                total_records += len(records) if records else 0
-            except Exception as e:
-                print(f"Failed to process {pdf_file}: {e}")
+            if os.path.basename(pdf_file) in processed:
+                print(f"File {os.path.basename(pdf_file)} already processed. Skipping...")
                 processing_results[os.path.basename(pdf_file)] = {
                     'records_count': 0,
-                    'status': 'error',
-                    'error': str(e)
+                    'status': 'already_processed'
                 }
+            else:
+                pending.append(pdf_file)
+        
+        # Largest files first, so a long PDF doesn't start last and leave the
+        # other workers idle while it finishes
+        pending.sort(key=os.path.getsize, reverse=True)
+        
+        if pending:
+            # One worker process per file, each with its own connection (the schema
+            # already exists, created by this instance). The cores are split between
+            # the files so the per-file page pools don't oversubscribe the machine.
+            cpus = os.cpu_count() or 1
+            file_workers = min(cpus, len(pending))
+            page_workers = max(1, cpus // file_workers)
+        
+            # The pool shuts down (waiting for every file) before bulk_load_mode
+            # rebuilds any dropped indexes
+            with self.bulk_load_mode(drop_indexes), ProcessPoolExecutor(max_workers=file_workers) as executor:
+                futures = [
+                    executor.submit(_process_one_pdf, pdf_file, file_type, page_workers)
+                    for pdf_file in pending
+                ]
+                for pdf_file, future in zip(pending, futures):
+                    try:
+                        records_count = future.result()
+                        processing_results[os.path.basename(pdf_file)] = {
+                            'records_count': records_count,
+                            'status': 'success' if records_count else 'no_data'
+                        }
+                        total_records += records_count
+                    except Exception as e:
+                        print(f"Failed to process {pdf_file}: {e}")
+                        processing_results[os.path.basename(pdf_file)] = {
+                            'records_count': 0,
+                            'status': 'error',
+                            'error': str(e)
+                        }
         
         print(f"\n=== Processing Summary ===")
         print(f"Total files processed: {len(pdf_files)}")
@@ -1402,8 +1764,11 @@ class NEETPGDataProcessor:
         print("⚠️  WARNING: This will delete ALL data from the database!")
         confirm = input("Type 'YES' to confirm: ")
         if confirm == 'YES':
-            self.cursor.execute('DELETE FROM counselling_data')
-            self.cursor.execute('DELETE FROM processed_files')
+            # TRUNCATE swaps in empty files instead of deleting row by row;
+            # CASCADE also empties verification_records, as the DELETE's
+            # ON DELETE CASCADE did. Ids keep counting up (no RESTART
+            # IDENTITY) so the web cache's version token changes on re-import.
+            self.cursor.execute('TRUNCATE counselling_data, processed_files CASCADE')
             self.conn.commit()
             print("Database cleared successfully!")
         else:
@@ -1427,6 +1792,98 @@ class NEETPGDataProcessor:
             self.conn.close()
 
 
+def _page_count(pdf_path):
+    """Count pages with PDFium instead of letting pdfminer walk the page tree.
+
+    The workers open the file with pdfplumber themselves, so the parent
+    process only needs the count to split the work.
+    """
+    import pypdfium2 as pdfium
+    
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _fast_text(pdf_path, page_index):
+    """Return (text, page_count) for one page using PDFium's C text extractor.
+
+    Only suitable for keyword checks: PDFium orders text by cell rather than
+    by visual row, so row-oriented parsing still goes through pdfplumber.
+    """
+    import pypdfium2 as pdfium
+    
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        text = pdf[page_index].get_textpage().get_text_range()
+        return text, len(pdf)
+    finally:
+        pdf.close()
+
+
+def _process_one_pdf(pdf_path, file_type, page_workers):
+    """Process one PDF end-to-end in a worker process and return its record count
+    
+    Database connections can't be shared across processes, so each worker
+    opens its own.
+    """
+    processor = NEETPGDataProcessor(connect=False, page_workers=page_workers)
+    processor.connect(create_tables=False)
+    try:
+        # Files that share allotments (later rounds repeat earlier ones) insert
+        # the same keys into ux_counselling_identity and can deadlock each
+        # other; the loser has been rolled back, so it is simply run again.
+        for attempt in range(1, IMPORT_ATTEMPTS + 1):
+            try:
+                # process_pdf_file returns [] for skipped files. The caller runs
+                # this under bulk_load_mode, which refreshes the planner statistics.
+                return processor.process_pdf_file(pdf_path, file_type, refresh_stats=False) or 0
+            except psycopg2.errors.DeadlockDetected:
+                if attempt == IMPORT_ATTEMPTS:
+                    raise
+                print(f"Deadlock importing {os.path.basename(pdf_path)}, retrying ({attempt + 1}/{IMPORT_ATTEMPTS})")
+    finally:
+        processor.close()
+
+
+def _parse_page_range(pdf_path, start, end, file_type, is_multi_round=False, round_number=1, backend='plumber'):
+    """Parse pages [start, end) of a PDF in a worker process
+    
+    Each worker opens the PDF itself since pdfplumber documents cannot be
+    shared between processes.
+    """
+    return list(_iter_page_range(pdf_path, start, end, file_type, is_multi_round, round_number, backend))
+
+
+def _iter_page_range(pdf_path, start, end, file_type, is_multi_round=False, round_number=1, backend='plumber'):
+    """Yield the records on pages [start, end) of a PDF, a page at a time
+    
+    Each page's cached layout objects are released once its rows are parsed,
+    so memory stays at one page's worth however long the range is.
+    """
+    # The PDF libraries are imported where pages are parsed, so commands that
+    # only query the database (stats, status, export, ...) start without them
+    import pdfplumber
+    import pypdfium2 as pdfium
+    
+    processor = NEETPGDataProcessor(connect=False)
+    text_pdf = pdfium.PdfDocument(pdf_path) if backend == 'pypdfium' else None
+    
+    try:
+        with pdfplumber.open(pdf_path, pages=list(range(start + 1, end + 1))) as pdf:
+            for page_num, page in enumerate(pdf.pages, start):
+                if file_type == 'state':
+                    yield from processor.parse_state_quota_page(page, page_num + 1)
+                else:
+                    yield from processor.parse_all_india_page(page, page_num + 1, is_multi_round, round_number, text_pdf)
+                page.close()
+    finally:
+        if text_pdf is not None:
+            text_pdf.close()
+
+
 # Example usage
 if __name__ == "__main__":
     import sys
@@ -1443,13 +1900,20 @@ if __name__ == "__main__":
             processor.close()
             sys.exit(0)
         elif command == 'stats':
-            stats = processor.get_statistics()
-            print("\n=== Database Statistics ===")
+            # --approx reads the planner's estimates instead of scanning the table
+            approx = '--approx' in sys.argv
+            if approx:
+                stats = processor.get_statistics(exact=False)
+                print("\n=== Database Statistics (estimated) ===")
+            else:
+                stats = processor.get_statistics()
+                print("\n=== Database Statistics ===")
             print(f"Total Records: {stats['total_records']}")
             print(f"Unique Colleges: {stats['unique_colleges']}")
             print(f"Unique Courses: {stats['unique_courses']}")
-            print(f"By Quota: {stats['by_quota']}")
-            print(f"By Category: {stats['by_category']}")
+            if not approx:
+                print(f"By Quota: {stats['by_quota']}")
+                print(f"By Category: {stats['by_category']}")
             processor.close()
             sys.exit(0)
         elif command == 'status':
@@ -1466,14 +1930,15 @@ if __name__ == "__main__":
             processor.close()
             sys.exit(0)
         elif command == 'batch':
-            # Batch import from data/pdfs directory
-            if len(sys.argv) > 2:
-                pdfs_dir = sys.argv[2]
+            # Batch import from data/pdfs directory: batch [<dir>] [--drop-indexes]
+            args = [arg for arg in sys.argv[2:] if not arg.startswith('--')]
+            if args:
+                pdfs_dir = args[0]
             else:
                 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
                 pdfs_dir = os.path.join(base_dir, 'data', 'pdfs')
             
-            processor.batch_import_pdfs(pdfs_dir)
+            processor.batch_import_pdfs(pdfs_dir, drop_indexes='--drop-indexes' in sys.argv)
             processor.close()
             sys.exit(0)
         elif command == 'export':
@@ -1486,13 +1951,15 @@ if __name__ == "__main__":
             processor.close()
             sys.exit(0)
         elif command == 'import':
-            # Import specific file: python pdf_uploader.py import <filepath> <format> [--verify] [--sample-rate=0.1]
+            # Import specific file: python pdf_uploader.py import <filepath> <format> [--verify] [--sample-rate=0.1] [--backend=plumber] [--exact-stats]
             if len(sys.argv) < 4:
-                print("Usage: python pdf_uploader.py import <filepath> <format> [--verify] [--sample-rate=0.1]")
+                print("Usage: python pdf_uploader.py import <filepath> <format> [--verify] [--sample-rate=0.1] [--backend=plumber] [--exact-stats]")
                 print("Formats: 'state' or 'all_india'")
                 print("Options:")
                 print("  --verify: Enable verification record creation with sampling")
                 print("  --sample-rate=X: Set sampling rate (default 0.1 = 10%)")
+                print("  --backend=X: Text extractor for all_india pages without tables, 'plumber' (default) or 'pypdfium' (faster)")
+                print("  --exact-stats: Count the database before and after instead of using planner estimates")
                 print("Example: python pdf_uploader.py import data/pdfs/DOC-20240822-WA0000.pdf state --verify --sample-rate=0.2")
                 processor.close()
                 sys.exit(1)
@@ -1502,8 +1969,16 @@ if __name__ == "__main__":
             
             # Parse optional flags
             enable_verification = '--verify' in sys.argv
+            exact_stats = '--exact-stats' in sys.argv
             sample_rate = 0.1
+            backend = 'plumber'
             for arg in sys.argv[4:]:
+                if arg.startswith('--backend='):
+                    backend = arg.split('=')[1]
+                    if backend not in TEXT_BACKENDS:
+                        print("Invalid backend. Must be 'plumber' or 'pypdfium'")
+                        processor.close()
+                        sys.exit(1)
                 if arg.startswith('--sample-rate='):
                     try:
                         sample_rate = float(arg.split('=')[1])
@@ -1516,7 +1991,7 @@ if __name__ == "__main__":
                         processor.close()
                         sys.exit(1)
             
-            if file_format not in ['state', 'all_india']:
+            if file_format not in FILE_TYPES:
                 print("Invalid format. Must be 'state' or 'all_india'")
                 processor.close()
                 sys.exit(1)
@@ -1528,29 +2003,35 @@ if __name__ == "__main__":
             
             if os.path.exists(file_path):
                 try:
-                    # Check current database stats before import
-                    stats_before = processor.get_statistics()
-                    print(f"Records before import: {stats_before['total_records']}")
+                    # Check current database stats before import; without
+                    # --exact-stats these are catalog estimates, not full counts
+                    estimate = '' if exact_stats else ' (estimated)'
+                    stats_before = processor.get_statistics(exact=exact_stats, fields=('total_records',))
+                    print(f"Records before import{estimate}: {stats_before['total_records']}")
                     
                     # Process the PDF file with explicit format and verification
+                    # (it returns [] for skipped files)
                     total_records = processor.process_pdf_file(
                         file_path, 
                         file_type=file_format,
                         enable_verification=enable_verification,
-                        sample_rate=sample_rate
-                    )
+                        sample_rate=sample_rate,
+                        backend=backend
+                    ) or 0
                     
                     if total_records > 0:
                         print(f"✅ Successfully imported {total_records} records from {os.path.basename(file_path)}")
                     else:
                         print(f"⚠️ No records were imported from {os.path.basename(file_path)}")
                         
-                    # Get updated statistics
-                    stats_after = processor.get_statistics()
-                    print(f"Records after import: {stats_after['total_records']} (net added: {stats_after['total_records'] - stats_before['total_records']})")
-                    print(f"Unique Colleges: {stats_after['unique_colleges']}")
-                    print(f"Unique Courses: {stats_after['unique_courses']}")
-                    print(f"By Quota: {stats_after['by_quota']}")
+                    # Get updated statistics; the net added count is the number
+                    # of rows process_pdf_file inserted either way
+                    stats_after = processor.get_statistics(exact=exact_stats)
+                    print(f"Records after import{estimate}: {stats_after['total_records']} (net added: {total_records})")
+                    print(f"Unique Colleges{estimate}: {stats_after['unique_colleges']}")
+                    print(f"Unique Courses{estimate}: {stats_after['unique_courses']}")
+                    if exact_stats:
+                        print(f"By Quota: {stats_after['by_quota']}")
                         
                 except Exception as e:
                     print(f"❌ Error importing {file_path}: {e}")
@@ -1572,7 +2053,7 @@ if __name__ == "__main__":
     print("Starting to process all PDFs in the 'pdfs' folder...")
     print("This will process files one by one with memory-efficient batching...")
     print("Using default format: state (for state quota PDFs)")
-    processing_results = processor.process_all_pdfs_in_folder('pdfs', 'state')
+    processing_results = processor.process_all_pdfs_in_folder('pdfs', 'state', drop_indexes='--drop-indexes' in sys.argv)
     
     # Get statistics
     stats = processor.get_statistics()
@@ -1583,21 +2064,24 @@ if __name__ == "__main__":
     print(f"By Quota: {stats['by_quota']}")
     print(f"By Category: {stats['by_category']}")
     
-    # Example: Get eligible colleges for a rank
-    rank = 5000
-    eligible = processor.get_eligible_colleges(rank)
-    print(f"\n=== All Eligible Colleges for Rank {rank} ===")
-    print(f"Total eligible colleges: {len(eligible)}")
-    
-    # Get best colleges (lowest cutoff ranks first)
-    best_colleges = processor.get_best_colleges_for_rank(rank, limit=10)
-    print(f"\n=== Top 10 Best Colleges for Rank {rank} (Lowest Cutoffs) ===")
-    for college in best_colleges:
-        print(f"- {college[0]}: {college[1]} (Cutoff: {college[3]})")
-    
-    # Export to JSON for web use
-    print("\nExporting data to JSON...")
-    processor.export_to_json()
+    # The sample queries and JSON export scan the whole table, so they only
+    # run when asked for; 'export' does the export on its own
+    if '--demo' in sys.argv:
+        # Example: Get eligible colleges for a rank
+        rank = 5000
+        eligible = processor.get_eligible_colleges(rank)
+        print(f"\n=== All Eligible Colleges for Rank {rank} ===")
+        print(f"Total eligible colleges: {len(eligible)}")
+        
+        # Get best colleges (lowest cutoff ranks first)
+        best_colleges = processor.get_best_colleges_for_rank(rank, limit=10)
+        print(f"\n=== Top 10 Best Colleges for Rank {rank} (Lowest Cutoffs) ===")
+        for college in best_colleges:
+            print(f"- {college[0]}: {college[1]} (Cutoff: {college[3]})")
+        
+        # Export to JSON for web use
+        print("\nExporting data to JSON...")
+        processor.export_to_json()
     
     # Close connection
     processor.close()
@@ -1606,10 +2090,12 @@ if __name__ == "__main__":
     print("All PDFs have been processed and data is ready for use!")
     print("\nUsage options:")
     print("  python pdf_uploader.py                    - Process all PDFs (default: state format)")
+    print("  python pdf_uploader.py --demo             - Also run sample rank queries and export to JSON")
     print("  python pdf_uploader.py import <file> <format> - Import specific file with format")
     print("  python pdf_uploader.py batch [<dir>]      - Batch import from data/pdfs directory")
+    print("  --drop-indexes (batch or default run)     - Drop lookup/search indexes while loading, rebuild at the end")
     print("  python pdf_uploader.py test               - Test PostgreSQL connection")
-    print("  python pdf_uploader.py stats              - Show basic database statistics")
+    print("  python pdf_uploader.py stats [--approx]   - Show basic database statistics")
     print("  python pdf_uploader.py status             - Show detailed database status")
     print("  python pdf_uploader.py validate           - Validate state counselling data")
     print("  python pdf_uploader.py verify             - Show verification status and pending records")
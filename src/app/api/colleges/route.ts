@@ -1,15 +1,14 @@
-import { NextResponse } from "next/server";
+import { NextRequest, NextResponse } from "next/server";
 import { getAllColleges } from "@/lib/api/counselling-data";
+import { cachedJsonResponse } from "@/lib/api/cache";
 
-export async function GET() {
+export async function GET(req: NextRequest) {
   try {
     const colleges = await getAllColleges();
 
-    return NextResponse.json({
-      success: true,
-      totalColleges: colleges.length,
-      colleges,
-    });
+    return cachedJsonResponse(req, colleges, (json) =>
+      `{"success":true,"totalColleges":${colleges.length},"colleges":${json}}`
+    );
   } catch (error) {
     console.error("Error fetching colleges:", error);
     return NextResponse.json(
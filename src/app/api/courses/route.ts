@@ -1,15 +1,14 @@
-import { NextResponse } from "next/server";
+import { NextRequest, NextResponse } from "next/server";
 import { getAllCourses } from "@/lib/api/counselling-data";
+import { cachedJsonResponse } from "@/lib/api/cache";
 
-export async function GET() {
+export async function GET(req: NextRequest) {
   try {
     const courses = await getAllCourses();
 
-    return NextResponse.json({
-      success: true,
-      totalCourses: courses.length,
-      courses,
-    });
+    return cachedJsonResponse(req, courses, (json) =>
+      `{"success":true,"totalCourses":${courses.length},"courses":${json}}`
+    );
   } catch (error) {
     console.error("Error fetching courses:", error);
     return NextResponse.json(
@@ -2,12 +2,22 @@ import { NextRequest, NextResponse } from "next/server";
 import { getEligibleColleges } from "@/lib/api/counselling-data";
 import { z } from "zod";
 
+// Upper bound on `limit`: the result is loaded in full before it is
+// serialized, so larger requests are clamped to this many rows.
+const MAX_LIMIT = 1000;
+
 const eligibilitySchema = z.object({
   rank: z.coerce.number().int().positive(),
   category: z.string().optional(),
   quota: z.string().optional(),
   round: z.string().optional(),
-  limit: z.coerce.number().int().positive().optional().default(100),
+  limit: z.coerce
+    .number()
+    .int()
+    .positive()
+    .optional()
+    .default(100)
+    .transform((limit) => Math.min(limit, MAX_LIMIT)),
 });
 
 export async function GET(req: NextRequest) {
@@ -1,7 +1,8 @@
-import { NextResponse } from "next/server";
+import { NextRequest, NextResponse } from "next/server";
 import { getDatabaseStatistics } from "@/lib/api/counselling-data";
+import { cachedJsonResponse } from "@/lib/api/cache";
 
-export async function GET() {
+export async function GET(req: NextRequest) {
   try {
     const statistics = await getDatabaseStatistics();
 
@@ -12,10 +13,9 @@ export async function GET() {
       );
     }
 
-    return NextResponse.json({
-      success: true,
-      statistics,
-    });
+    return cachedJsonResponse(req, statistics, (json) =>
+      `{"success":true,"statistics":${json}}`
+    );
   } catch (error) {
     console.error("Error fetching statistics:", error);
     return NextResponse.json(
@@ -1,5 +1,6 @@
 import { prisma } from "@/lib/db/prisma";
 import { Prisma } from "@prisma/client";
+import { cached } from "@/lib/api/cache";
 
 export type EligibilityFilters = {
   rank: number;
@@ -17,56 +18,52 @@ export async function getEligibleColleges({
   limit = 100,
 }: EligibilityFilters) {
   try {
-    const where: Prisma.CounsellingDataWhereInput = {
-      // A candidate is eligible if their rank is better than or equal to the
-      // last admitted (cutoff) rank. With lower ranks being better,
-      // eligibility is: cutoffRank >= userRank
-      rank: { gte: rank },
-      collegeName: { not: null },
-      course: { not: null },
-    };
+    // A candidate is eligible if their rank is better than or equal to the
+    // last admitted (cutoff) rank. With lower ranks being better,
+    // eligibility is: cutoffRank >= userRank
+    const filters = [
+      Prisma.sql`rank >= ${rank}`,
+      Prisma.sql`college_name IS NOT NULL`,
+      Prisma.sql`course IS NOT NULL`,
+    ];
 
     if (category && category !== "all") {
-      where.category = category;
+      filters.push(Prisma.sql`category = ${category}`);
     }
 
     if (quota && quota !== "all") {
-      where.quota = quota;
+      filters.push(Prisma.sql`quota = ${quota}`);
     }
 
     if (round && round !== "all") {
-      where.round = parseInt(round);
+      filters.push(Prisma.sql`round = ${parseInt(round)}`);
     }
 
-    const results = await prisma.counsellingData.findMany({
-      where,
-      select: {
-        collegeName: true,
-        course: true,
-        quota: true,
-        rank: true,
-        category: true,
-        round: true,
-        year: true,
-        state: true,
-      },
-      orderBy: {
-        rank: "asc",
-      },
-      take: limit,
-      distinct: ["collegeName", "course", "quota", "category", "round", "year", "state"],
-    });
-
-    return results.map((result) => ({
-      college: result.collegeName,
-      course: result.course,
-      quota: result.quota,
-      cutoffRank: result.rank != null ? Number(result.rank) : null,
-      category: result.category || "GENERAL",
-      round: result.round,
-      year: result.year,
-      state: result.state,
-    }));
+    // Group and limit in the database: Prisma's `distinct` is applied in
+    // memory after fetching every row in the rank range, whereas
+    // ORDER BY ... LIMIT on the grouped rows lets Postgres keep only the
+    // best `limit` groups (top-N heapsort) and return just those.
+    // Columns are aliased to the response shape so rows need no remapping.
+    return await prisma.$queryRaw<
+      Array<{
+        college: string | null;
+        course: string | null;
+        quota: string | null;
+        cutoffRank: number | null;
+        category: string;
+        round: number | null;
+        year: number | null;
+        state: string | null;
+      }>
+    >`
+      SELECT college_name AS college, course, quota, MIN(rank)::float8 AS "cutoffRank",
+             COALESCE(category, 'GENERAL') AS category, round, year, state
+      FROM counselling_data
+      WHERE ${Prisma.join(filters, " AND ")}
+      GROUP BY college_name, course, quota, category, round, year, state
+      ORDER BY MIN(rank) ASC
+      LIMIT ${limit}
+    `;
   } catch (error) {
     console.error("Failed to fetch eligible colleges:", error);
     return [];
@@ -75,26 +72,16 @@ export async function getEligibleColleges({
 
 export async function getAllColleges() {
   try {
-    const colleges = await prisma.counsellingData.findMany({
-      where: {
-        collegeName: { not: null },
-      },
-      select: {
-        collegeName: true,
-        state: true,
-        quota: true,
-      },
-      distinct: ["collegeName", "state", "quota"],
-      orderBy: {
-        collegeName: "asc",
-      },
-    });
-
-    return colleges.map((college) => ({
-      name: college.collegeName,
-      state: college.state,
-      quota: college.quota,
-    }));
+    return await cached("colleges", () =>
+      prisma.$queryRaw<
+        Array<{ name: string; state: string | null; quota: string | null }>
+      >`
+        SELECT DISTINCT college_name AS name, state, quota
+        FROM counselling_data
+        WHERE college_name IS NOT NULL
+        ORDER BY name
+      `
+    );
   } catch (error) {
     console.error("Failed to fetch colleges:", error);
     return [];
@@ -103,26 +90,28 @@ export async function getAllColleges() {
 
 export async function getAllCourses() {
   try {
-    // Group by course and count colleges
-    const courses = await prisma.counsellingData.groupBy({
-      by: ["course"],
-      where: {
-        course: { not: null },
-      },
-      _count: {
-        collegeName: true,
-      },
-      orderBy: {
+    return await cached("courses", async () => {
+      // Group by course and count colleges
+      const courses = await prisma.counsellingData.groupBy({
+        by: ["course"],
+        where: {
+          course: { not: null },
+        },
         _count: {
-          collegeName: "desc",
+          collegeName: true,
         },
-      },
-    });
+        orderBy: {
+          _count: {
+            collegeName: "desc",
+          },
+        },
+      });
 
-    return courses.map((course) => ({
-      name: course.course,
-      collegeCount: course._count.collegeName,
-    }));
+      return courses.map((course) => ({
+        name: course.course,
+        collegeCount: course._count.collegeName,
+      }));
+    });
   } catch (error) {
     console.error("Failed to fetch courses:", error);
     return [];
@@ -131,29 +120,24 @@ export async function getAllCourses() {
 
 export async function getCollegeCutoffs(collegeName: string) {
   try {
-    const cutoffs = await prisma.counsellingData.groupBy({
-      by: ["course", "category", "quota", "round", "year"],
-      where: {
-        collegeName: collegeName,
-      },
-      _min: {
-        rank: true,
-      },
-      orderBy: {
-        _min: {
-          rank: "asc",
-        },
-      },
-    });
-
-    return cutoffs.map((cutoff) => ({
-      course: cutoff.course,
-      category: cutoff.category || "GENERAL",
-      quota: cutoff.quota,
-      cutoffRank: cutoff._min.rank != null ? Number(cutoff._min.rank) : null,
-      round: cutoff.round,
-      year: cutoff.year,
-    }));
+    // idx_college_course leads with college_name, so this stays an index lookup
+    return await prisma.$queryRaw<
+      Array<{
+        course: string | null;
+        category: string;
+        quota: string | null;
+        cutoffRank: number | null;
+        round: number | null;
+        year: number | null;
+      }>
+    >`
+      SELECT course, COALESCE(category, 'GENERAL') AS category, quota,
+             MIN(rank)::float8 AS "cutoffRank", round, year
+      FROM counselling_data
+      WHERE college_name = ${collegeName}
+      GROUP BY course, category, quota, round, year
+      ORDER BY MIN(rank) ASC
+    `;
   } catch (error) {
     console.error("Failed to fetch college cutoffs:", error);
     return [];
@@ -170,44 +154,30 @@ export async function searchCollegesAndCourses(query: string, type: string = "al
       courses: [],
     };
 
-    if (type === "all" || type === "college") {
-      const colleges = await prisma.counsellingData.findMany({
-        where: {
-          collegeName: {
-            contains: query,
-            mode: "insensitive",
-          },
-        },
-        select: {
-          collegeName: true,
-          state: true,
-          quota: true,
-        },
-        distinct: ["collegeName", "state", "quota"],
-        take: 20,
-      });
+    // Substring match with LIKE wildcards in the user's text escaped. The
+    // pg_trgm GIN indexes on college_name and course serve ILIKE '%...%',
+    // and DISTINCT ... LIMIT runs in Postgres instead of Prisma
+    // de-duplicating every matching row in memory.
+    const pattern = `%${query.replace(/[\\%_]/g, "\\$&")}%`;
 
-      results.colleges = colleges.map((college) => ({
-        name: college.collegeName,
-        state: college.state,
-        quota: college.quota,
-      }));
+    if (type === "all" || type === "college") {
+      results.colleges = await prisma.$queryRaw<
+        Array<{ name: string | null; state: string | null; quota: string | null }>
+      >`
+        SELECT DISTINCT college_name AS name, state, quota
+        FROM counselling_data
+        WHERE college_name ILIKE ${pattern}
+        LIMIT 20
+      `;
     }
 
     if (type === "all" || type === "course") {
-      const courses = await prisma.counsellingData.findMany({
-        where: {
-          course: {
-            contains: query,
-            mode: "insensitive",
-          },
-        },
-        select: {
-          course: true,
-        },
-        distinct: ["course"],
-        take: 20,
-      });
+      const courses = await prisma.$queryRaw<Array<{ course: string | null }>>`
+        SELECT DISTINCT course
+        FROM counselling_data
+        WHERE course ILIKE ${pattern}
+        LIMIT 20
+      `;
 
       results.courses = courses.map((course) => course.course);
     }
@@ -221,70 +191,51 @@ export async function searchCollegesAndCourses(query: string, type: string = "al
 
 export async function getDatabaseStatistics() {
   try {
-    const stats: Record<string, unknown> = {};
-
-    // Total records
-    const totalRecords = await prisma.counsellingData.count();
-    stats.totalRecords = totalRecords;
-
-    // Records by quota
-    const quotaCounts = await prisma.counsellingData.groupBy({
-      by: ["quota"],
-      _count: {
-        quota: true,
-      },
-    });
-    stats.byQuota = Object.fromEntries(
-      quotaCounts.map((q) => [q.quota || 'unknown', q._count.quota])
-    );
-
-    // Records by category
-    const categoryCounts = await prisma.counsellingData.groupBy({
-      by: ["category"],
-      where: {
-        category: { not: null },
-      },
-      _count: {
-        category: true,
-      },
-    });
-    stats.byCategory = Object.fromEntries(
-      categoryCounts.map((c) => [c.category || 'unknown', c._count.category])
-    );
-
-    // Unique colleges
-    const uniqueColleges = await prisma.counsellingData.findMany({
-      select: {
-        collegeName: true,
-      },
-      distinct: ["collegeName"],
-    });
-    stats.uniqueColleges = uniqueColleges.length;
-
-    // Unique courses
-    const uniqueCourses = await prisma.counsellingData.findMany({
-      select: {
-        course: true,
-      },
-      distinct: ["course"],
-    });
-    stats.uniqueCourses = uniqueCourses.length;
-
-    // Rank ranges
-    const rankRange = await prisma.counsellingData.aggregate({
-      _min: {
-        rank: true,
-      },
-      _max: {
-        rank: true,
-      },
+    return await cached("statistics", async () => {
+      // One statement instead of six round-trips. The expressions mirror the
+      // Prisma queries this replaced: quota groups are counted on the non-null
+      // column, and a NULL college/course counts as one more distinct value,
+      // as it did with findMany({ distinct }).
+      const [row] = await prisma.$queryRaw<
+        Array<{
+          totalRecords: number;
+          byQuota: Record<string, number>;
+          byCategory: Record<string, number>;
+          uniqueColleges: number;
+          uniqueCourses: number;
+          minRank: number | null;
+          maxRank: number | null;
+        }>
+      >`
+        WITH by_quota AS (
+          SELECT COALESCE(quota, 'unknown') AS key, COUNT(quota)::int AS n
+          FROM counselling_data
+          GROUP BY quota
+        ), by_category AS (
+          SELECT category AS key, COUNT(category)::int AS n
+          FROM counselling_data
+          WHERE category IS NOT NULL
+          GROUP BY category
+        )
+        SELECT COUNT(*)::int AS "totalRecords",
+               (SELECT COALESCE(json_object_agg(key, n), '{}') FROM by_quota) AS "byQuota",
+               (SELECT COALESCE(json_object_agg(key, n), '{}') FROM by_category) AS "byCategory",
+               (COUNT(DISTINCT college_name) + (COUNT(*) > COUNT(college_name))::int)::int AS "uniqueColleges",
+               (COUNT(DISTINCT course) + (COUNT(*) > COUNT(course))::int)::int AS "uniqueCourses",
+               MIN(rank)::float8 AS "minRank",
+               MAX(rank)::float8 AS "maxRank"
+        FROM counselling_data
+      `;
+
+      const { minRank, maxRank, ...stats } = row;
+      return {
+        ...stats,
+        rankRange: {
+          minimum: minRank,
+          maximum: maxRank,
+        },
+      };
     });
-    stats.rankRange = {
-      minimum: rankRange._min.rank != null ? Number(rankRange._min.rank) : null,
-      maximum: rankRange._max.rank != null ? Number(rankRange._max.rank) : null,
-    };
-
-    return stats;
   } catch (error) {
     console.error("Failed to fetch statistics:", error);
     return null;
@@ -4,7 +4,9 @@ declare global {
   var prisma: PrismaClient | undefined;
 }
 
-// Prevent multiple instances of Prisma Client in development
+// Reuse a single Prisma Client (and its connection pool) per process.
+// Route bundles can evaluate this module more than once, and dev HMR
+// re-evaluates it on every change, so the instance lives on `global`.
 export const prisma = global.prisma || new PrismaClient();
 
-if (process.env.NODE_ENV !== "production") global.prisma = prisma;
+global.prisma = prisma;